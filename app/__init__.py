@@ -0,0 +1,5 @@
+from dotenv import load_dotenv
+
+# O .env é carregado uma única vez, antes de qualquer módulo do app ler as
+# variáveis de ambiente.
+load_dotenv()
@@ -0,0 +1,14 @@
+import os
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def endpoint_setting(prefix: str, endpoint: str, key: str, default: str) -> float:
+    # <PREFIX>_<ENDPOINT>_<KEY> sobrescreve <PREFIX>_<KEY> para um endpoint específico.
+    value = os.getenv(f"{prefix}_{endpoint.upper()}_{key}") or os.getenv(f"{prefix}_{key}", default)
+    return float(value)
@@ -1,5 +1,6 @@
 class BotProposalInfoException(Exception):
-    def __init__(self, message):
+    def __init__(self, message, status_code=None):
         self.name = ("ProposalInfoException",)
         self.message = message
+        self.status_code = status_code
         super().__init__(message)
@@ -1,2 +1,2 @@
-from app.models.prata_api_models import SimulationRequest, ProposalRequestPIX, ProposalRequestCC, FormalizationRequest
+from app.models.prata_api_models import SimulationRequest, SimulationBatchRequest, ProposalRequestPIX, ProposalRequestCC, FormalizationRequest, ContactListRequest
 from app.models.banks_models import Bank
\ No newline at end of file
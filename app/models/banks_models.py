@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class Bank(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: int
     code: str
     ispb: str
@@ -1,10 +1,41 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import AfterValidator, BaseModel, Field, field_validator, model_validator
+from typing import Annotated, Optional, Dict, Any, List
+from app.utils.validators import (
+    contact_errors,
+    validate_cep,
+    validate_cpf,
+    validate_date,
+    validate_phone,
+    validate_uf,
+)
+import os
+
+# Entradas que o banco recusaria são barradas aqui, antes de qualquer
+# chamada (422); os valores chegam ao serviço já normalizados.
+Cpf = Annotated[str, AfterValidator(validate_cpf)]
+Phone = Annotated[str, AfterValidator(validate_phone)]
+PastDate = Annotated[str, AfterValidator(validate_date)]
+UF = Annotated[str, AfterValidator(validate_uf)]
+Cep = Annotated[str, AfterValidator(validate_cep)]
+
+# O corpo inteiro é lido e validado antes do processamento: o tamanho das
+# listas de contatos é limitado para a memória não crescer com o lote.
+BATCH_MAX_CONTACTS = int(os.getenv("BATCH_MAX_CONTACTS", "5000"))
 
 class SimulationRequest(BaseModel):
     contact: Dict[str, Any]
     bank_access: Dict[str, str]
 
+    @field_validator("contact")
+    @classmethod
+    def check_cpf(cls, contact: Dict[str, Any]) -> Dict[str, Any]:
+        return {**contact, "cpf": validate_cpf(contact.get("cpf") or "")}
+
+class SimulationBatchRequest(BaseModel):
+    contacts: List[Dict[str, Any]] = Field(max_length=BATCH_MAX_CONTACTS)
+    bank_access: Dict[str, str]
+    concurrency: Optional[int] = None
+
 class PIXResume(BaseModel):
     account_number: str
     account_type: str
@@ -13,22 +44,29 @@ class PIXResume(BaseModel):
     account_created_at: str
 
 class Contact(BaseModel):
-    cpf: str
-    birthdate: str
+    cpf: Cpf
+    birthdate: PastDate
     gender: str
     name: str
-    phone: str
-    document_issue_date: str
+    phone: Phone
+    document_issue_date: PastDate
     document: str
-    document_federation_unit: str
+    document_federation_unit: UF
     document_type: str
     mother_name: str
     city: str
     suburb: str
     number: str
-    state: str
+    state: UF
     street: str
-    zip_code: str
+    zip_code: Cep
+
+    @model_validator(mode="after")
+    def check_dates(self) -> "Contact":
+        errors = contact_errors(self.model_dump())
+        if errors:
+            raise ValueError("; ".join(errors.values()))
+        return self
 
 class ProposalRequestPIX(BaseModel):
     contact: Contact
@@ -47,4 +85,8 @@ class ProposalRequestCC(BaseModel):
     bank_access: Dict[str, str]
 
 class FormalizationRequest(BaseModel):
-    bank_access: Dict[str, str]
\ No newline at end of file
+    bank_access: Dict[str, str]
+
+class ContactListRequest(BaseModel):
+    contacts: List[Dict[str, Any]] = Field(max_length=BATCH_MAX_CONTACTS)
+    required: List[str] = ["cpf"]
\ No newline at end of file
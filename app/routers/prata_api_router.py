@@ -1,80 +1,216 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from typing import Optional
-from app.services.prata_api_service import PrataApiService
-from app.services import BankService, ViaCEPService
+from app.services.prata_api_service import (
+    PrataApiService,
+    formalization_links,
+    simulation_cache,
+)
+from app.services import ViaCEPService
+from app.services.http_client import http_pool
+from app.services.stage_executor import proposal_stage_stats
+from app.services.cep_service import cep_cache
+from app.services.pix_lookup import pix_lookup
+from app.services.banks_service import render_bank_list, render_bank_search
+from app.services.prerendered import PrerenderedResponse
+from app.services.circuit_breaker import circuit_breakers, is_circuit_open
+from app.services.rate_limiter import is_rate_limited, rate_limiter
+from app.services.proxy_pool import proxy_pool
+from app.services.retry_policy import deadline_scope, retry_stats
+from app.services.job_manager import Job, job_manager
 from app.exceptions import APIException
 from app.models.prata_api_models import (
     SimulationRequest,
+    SimulationBatchRequest,
     ProposalRequestPIX,
     ProposalRequestCC,
     FormalizationRequest,
+    ContactListRequest,
 )
-from app.utils import get_bank_info
-import traceback
+from app.utils import get_bank_info, get_logger, validate_cep, validate_contacts, validate_cpf
+from app.utils.json_codec import FastJSONResponse, json_dumps
+import asyncio
 
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 
 def get_prata_service():
     return PrataApiService()
 
 
-def get_bank_service():
-    return BankService()
+def get_viacep_service():
+    return ViaCEPService(client=http_pool.get_viacep_client())
+
 
+def error_status(error: Exception, default: int = 400) -> int:
+    if isinstance(error, APIException):
+        return error.status_code
+    if is_rate_limited(error):
+        return 429
+    return 503 if is_circuit_open(error) else default
 
-def get_viacep_service():
-    return ViaCEPService()
+
+async def submit_job(request: Request, kind: str, func) -> FastJSONResponse:
+    try:
+        job = await job_manager.submit(kind, func)
+    except APIException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.to_dict())
+    return FastJSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": str(request.url_for("get_job", job_id=job.id)),
+            "events_url": str(request.url_for("get_job_events", job_id=job.id)),
+        },
+    )
+
+
+def job_payload(job: Job) -> dict:
+    payload = job.to_dict()
+    if job.error is not None:
+        payload["status_code"] = error_status(job.error)
+    return payload
 
 
 @router.post("/simulate_fgts")
 async def simulate_fgts(
-    data: SimulationRequest, prata_service: PrataApiService = Depends(get_prata_service)
+    request: Request,
+    data: SimulationRequest,
+    run_async: bool = Query(False, alias="async"),
+    prata_service: PrataApiService = Depends(get_prata_service),
+):
+    async def run():
+        with deadline_scope(prata_service.simulation_deadline):
+            return await prata_service.simulate_fgts(data.dict())
+
+    if run_async:
+        return await submit_job(request, "simulate_fgts", run)
+    try:
+        return FastJSONResponse(await run())
+    except Exception as error:
+        logger.warning("Falha na simulação FGTS", exc_info=True)
+        raise HTTPException(status_code=error_status(error), detail=str(error))
+
+
+@router.post("/simulate_fgts/batch")
+async def simulate_fgts_batch(
+    data: SimulationBatchRequest,
+    prata_service: PrataApiService = Depends(get_prata_service),
 ):
+    # Sem data.dict(): a lista de contatos não é copiada de novo.
+    batch_data = {"contacts": data.contacts, "bank_access": data.bank_access}
     try:
-        return await prata_service.simulate_fgts(data.dict())
+        await prata_service.get_auth_headers(batch_data)
     except Exception as error:
-        traceback.print_exc()
-        raise HTTPException(status_code=400, detail=str(error))
+        raise HTTPException(status_code=error_status(error), detail=str(error))
+
+    async def ndjson_lines():
+        async for result in prata_service.simulate_fgts_batch(
+            batch_data, data.concurrency
+        ):
+            yield json_dumps(result) + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 
 @router.post("/send_proposal_pix")
 async def send_proposal_pix(
+    request: Request,
     data: ProposalRequestPIX,
+    run_async: bool = Query(False, alias="async"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     prata_service: PrataApiService = Depends(get_prata_service),
 ):
-    try:
+    async def run():
         proposal_data = data.dict(exclude_unset=True)
         proposal_data["send_method"] = "pix"
-        return await prata_service.send_proposal_pix(proposal_data)
+        with deadline_scope(prata_service.proposal_deadline):
+            return await prata_service.send_proposal_pix(
+                proposal_data, idempotency_key
+            )
+
+    if run_async:
+        return await submit_job(request, "send_proposal_pix", run)
+    try:
+        return FastJSONResponse(await run())
     except Exception as error:
-        raise HTTPException(status_code=400, detail=str(error))
+        raise HTTPException(status_code=error_status(error), detail=str(error))
 
 
 @router.post("/send_proposal_cc")
 async def send_proposal_cc(
-    data: ProposalRequestCC, prata_service: PrataApiService = Depends(get_prata_service)
+    request: Request,
+    data: ProposalRequestCC,
+    run_async: bool = Query(False, alias="async"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    prata_service: PrataApiService = Depends(get_prata_service),
 ):
-    try:
+    async def run():
         proposal_data = data.dict(exclude_unset=True)
         proposal_data["send_method"] = "bank_account"
-        return await prata_service.send_proposal_cc(proposal_data)
+        with deadline_scope(prata_service.proposal_deadline):
+            return await prata_service.send_proposal_cc(
+                proposal_data, idempotency_key
+            )
+
+    if run_async:
+        return await submit_job(request, "send_proposal_cc", run)
+    try:
+        return FastJSONResponse(await run())
     except Exception as error:
-        raise HTTPException(status_code=400, detail=str(error))
+        raise HTTPException(status_code=error_status(error), detail=str(error))
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado ou expirado")
+    return FastJSONResponse(job_payload(job))
+
+
+@router.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado ou expirado")
+
+    async def events():
+        yield b"event: status\ndata: " + json_dumps({"id": job.id, "status": job.status}) + b"\n\n"
+        while not job.done.is_set():
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+        payload = json_dumps(job_payload(job))
+        yield f"event: {job.status}\ndata: ".encode() + payload + b"\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/get_formalization_url/{proposal_id}")
 async def get_formalization_url(
     proposal_id: str,
     data: FormalizationRequest,
+    wait: float = Query(
+        0, ge=0, description="Segundos aguardando o link ficar disponível (long-poll)"
+    ),
     prata_service: PrataApiService = Depends(get_prata_service),
 ):
     try:
-        result = await prata_service.get_formalization_url(data.dict(), proposal_id)
-        return {"link": result}
+        result = await prata_service.get_formalization_url(
+            data.dict(), proposal_id, wait
+        )
+        return FastJSONResponse({"link": result})
     except Exception as error:
-        raise HTTPException(status_code=400, detail=str(error))
+        raise HTTPException(status_code=error_status(error), detail=str(error))
 
 
 @router.post("/get_pix_infos/{cpf}")
@@ -82,38 +218,103 @@ async def get_pix_infos(
     cpf: str, data: dict, prata_service: PrataApiService = Depends(get_prata_service)
 ):
     try:
-        result = await prata_service.get_pix(data, cpf)
-        return get_bank_info(result)
-    except Exception:
-        traceback.print_exc()
-        raise HTTPException(status_code=400, detail="Erro ao buscar informações do PIX")
+        cpf = validate_cpf(cpf)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    try:
+        account = await prata_service.lookup_pix(data, cpf)
+    except Exception as error:
+        logger.warning("Falha ao buscar informações do PIX", exc_info=True)
+        raise HTTPException(
+            status_code=error_status(error), detail="Erro ao buscar informações do PIX"
+        )
+    if account is None:
+        raise HTTPException(
+            status_code=404, detail="Nenhuma conta PIX encontrada para o CPF"
+        )
+    return FastJSONResponse(get_bank_info(account))
+
+
+@router.post("/validate_contacts")
+async def validate_contact_list(data: ContactListRequest):
+    # Só validação local: nenhuma chamada ao banco ou à ViaCEP.
+    return FastJSONResponse(validate_contacts(data.contacts, data.required))
+
+
+@router.get("/cache_stats")
+async def get_cache_stats():
+    return {
+        "simulation": simulation_cache.stats(),
+        "cep": cep_cache.stats(),
+        "formalization": formalization_links.stats(),
+        "pix": pix_lookup.stats(),
+    }
+
+
+@router.get("/stage_stats")
+async def get_stage_stats():
+    return {"proposal": proposal_stage_stats.snapshot()}
+
+
+@router.get("/circuit_breakers")
+async def get_circuit_breakers():
+    return circuit_breakers.snapshot()
+
+
+@router.get("/rate_limits")
+async def get_rate_limits():
+    return rate_limiter.snapshot()
+
+
+@router.get("/proxies")
+async def get_proxies():
+    return proxy_pool.snapshot()
+
+
+@router.get("/retry_stats")
+async def get_retry_stats():
+    return retry_stats.snapshot()
 
 
 @router.get("/banks")
 async def get_banks(
+    request: Request,
     query: Optional[str] = Query(
         None, description="Código do banco ou parte do nome para busca"
-    )
+    ),
 ):
-    bank_service = get_bank_service()
-
     if query:
-        bank = bank_service.search_bank(query)
-        if bank:
-            return [bank.dict()]
-        else:
-            return []
+        rendered = render_bank_search(query.strip().lower())
     else:
-        return [bank.dict() for bank in bank_service.list_all_banks()]
+        rendered = render_bank_list()
+    return prerendered_response(request, rendered)
+
+
+def prerendered_response(request: Request, rendered: PrerenderedResponse) -> Response:
+    encoding, body, etag = rendered.select(request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "public, max-age=300",
+    }
+    if rendered.matches(request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/cep/{cep}")
 async def get_address(
     cep: str, viacep_service: ViaCEPService = Depends(get_viacep_service)
 ):
+    try:
+        cep = validate_cep(cep)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
     try:
         address = await viacep_service.get_address(cep)
-        return address
+        return FastJSONResponse(address)
     except APIException as e:
         raise HTTPException(status_code=e.status_code, detail=e.to_dict())
     except Exception as e:
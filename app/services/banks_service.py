@@ -1,26 +1,126 @@
 import json
-from typing import List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 from app.models import Bank
+from app.services.prerendered import PrerenderedResponse
 import os
+import re
+import unicodedata
 from functools import lru_cache
 
+BANKS_FILE = os.path.join(os.path.dirname(__file__), "banks.json")
+
+
+def fold_text(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text)
+    without_accents = "".join(char for char in normalized if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", without_accents.lower()).split())
+
+
+def _group_by(banks: Tuple[Bank, ...], field: str) -> Mapping[str, Tuple[Bank, ...]]:
+    groups: Dict[str, List[Bank]] = {}
+    for bank in banks:
+        value = getattr(bank, field)
+        if value:
+            groups.setdefault(value, []).append(bank)
+    return MappingProxyType({key: tuple(value) for key, value in groups.items()})
+
+
+class BankDirectory:
+    def __init__(self, banks: List[Bank]):
+        self.banks = tuple(banks)
+        self.by_code = _group_by(self.banks, "code")
+        self.by_ispb = _group_by(self.banks, "ispb")
+        self.name_index = tuple(
+            (fold_text(bank.name), tuple(fold_text(bank.name).split()), bank)
+            for bank in self.banks
+        )
+
+    def get_by_code(self, code: str) -> Tuple[Bank, ...]:
+        code = code.strip()
+        if code.isdigit() and len(code) < 3:
+            code = code.zfill(3)
+        return self.by_code.get(code, ())
+
+    def get_by_ispb(self, ispb: str) -> Tuple[Bank, ...]:
+        return self.by_ispb.get(ispb.strip(), ())
+
+    def search(self, query: str) -> List[Bank]:
+        ranked: Dict[int, Tuple[int, int]] = {}
+
+        def add(bank: Bank, rank: int, position: int):
+            current = ranked.get(bank.id)
+            if current is None or rank < current[0]:
+                ranked[bank.id] = (rank, position)
+
+        banks_by_id = {}
+        for bank in self.get_by_code(query) + self.get_by_ispb(query):
+            banks_by_id[bank.id] = bank
+            add(bank, 0, 0)
+
+        folded = fold_text(query)
+        if folded:
+            for position, (name, words, bank) in enumerate(self.name_index):
+                if name == folded:
+                    rank = 1
+                elif name.startswith(folded):
+                    rank = 2
+                elif any(word.startswith(folded) for word in words):
+                    rank = 3
+                elif folded in name:
+                    rank = 4
+                else:
+                    continue
+                banks_by_id[bank.id] = bank
+                add(bank, rank, position)
+
+        order = sorted(ranked, key=lambda bank_id: ranked[bank_id])
+        return [banks_by_id[bank_id] for bank_id in order]
+
+
+def load_bank_directory(file_path: str = BANKS_FILE) -> BankDirectory:
+    return _load_bank_directory(os.path.abspath(file_path))
+
+
+@lru_cache(maxsize=None)
+def _load_bank_directory(file_path: str) -> BankDirectory:
+    with open(file_path, 'r', encoding='utf-8') as file:
+        banks_data = json.load(file)
+    return BankDirectory([Bank(**bank) for bank in banks_data])
+
+
+@lru_cache(maxsize=1)
+def render_bank_list() -> PrerenderedResponse:
+    return PrerenderedResponse([bank.model_dump() for bank in load_bank_directory().banks])
+
+
+@lru_cache(maxsize=1024)
+def render_bank_search(query: str) -> PrerenderedResponse:
+    return PrerenderedResponse(
+        [bank.model_dump() for bank in load_bank_directory().search(query)]
+    )
+
+
 class BankService:
     def __init__(self, file_path: str = "banks.json"):
         self.file_path = os.path.join(os.path.dirname(__file__), file_path)
-        self.banks = self._load_banks()
+        self.directory = load_bank_directory(self.file_path)
+        self.banks = self.directory.banks
 
-    @lru_cache(maxsize=1)
-    def _load_banks(self) -> List[Bank]:
-        with open(self.file_path, 'r', encoding='utf-8') as file:
-            banks_data = json.load(file)
-        return [Bank(**bank) for bank in banks_data]
+    def search_banks(self, query: str) -> List[Bank]:
+        return self.directory.search(query)
 
     def search_bank(self, query: str) -> Optional[Bank]:
-        query = query.lower()
-        for bank in self.banks:
-            if bank.code == query or query in bank.name.lower():
-                return bank
-        return None
+        matches = self.search_banks(query)
+        return matches[0] if matches else None
+
+    def get_by_code(self, code: str) -> Optional[Bank]:
+        matches = self.directory.get_by_code(code)
+        return matches[0] if matches else None
+
+    def get_by_ispb(self, ispb: str) -> Optional[Bank]:
+        matches = self.directory.get_by_ispb(ispb)
+        return matches[0] if matches else None
 
     def list_all_banks(self) -> List[Bank]:
-        return self.banks
\ No newline at end of file
+        return list(self.banks)
@@ -0,0 +1,109 @@
+from typing import Dict, Optional
+import csv
+import os
+import re
+import sqlite3
+import sys
+
+# Aceita tanto os nomes de coluna da ViaCEP quanto os nomes usados pela API.
+COLUMN_ALIASES = {
+    "cep": "cep",
+    "zipcode": "cep",
+    "logradouro": "street",
+    "street": "street",
+    "complemento": "complement",
+    "complement": "complement",
+    "bairro": "neighborhood",
+    "neighborhood": "neighborhood",
+    "localidade": "city",
+    "cidade": "city",
+    "city": "city",
+    "uf": "state",
+    "state": "state",
+}
+
+
+def normalize_cep(cep: str) -> str:
+    return re.sub(r"\D", "", cep)
+
+
+class CepDataset:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(
+            f"file:{db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["CepDataset"]:
+        db_path = os.getenv("CEP_DATABASE_PATH")
+        if not db_path or not os.path.exists(db_path):
+            return None
+        return cls(db_path)
+
+    def lookup(self, cep: str) -> Optional[Dict[str, str]]:
+        row = self.connection.execute(
+            "SELECT cep, street, complement, neighborhood, city, state FROM ceps WHERE cep = ?",
+            (normalize_cep(cep),),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "city": row[4],
+            "neighborhood": row[3],
+            "state": row[5],
+            "street": row[1],
+            "zipcode": f"{row[0][:5]}-{row[0][5:]}",
+            "complement": row[2],
+        }
+
+    def close(self):
+        self.connection.close()
+
+
+def load_csv(csv_path: str, db_path: str, batch_size: int = 10000) -> int:
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS ceps ("
+        "cep TEXT PRIMARY KEY, street TEXT, complement TEXT, "
+        "neighborhood TEXT, city TEXT, state TEXT) WITHOUT ROWID"
+    )
+    total = 0
+    with open(csv_path, "r", encoding="utf-8", newline="") as file:
+        sample = file.read(4096)
+        file.seek(0)
+        reader = csv.DictReader(file, dialect=csv.Sniffer().sniff(sample, ";,\t"))
+        batch = []
+        for row in reader:
+            values = {"street": "", "complement": "", "neighborhood": "", "city": "", "state": ""}
+            for column, value in row.items():
+                field = COLUMN_ALIASES.get((column or "").strip().lower())
+                if field:
+                    values[field] = (value or "").strip()
+            cep = normalize_cep(values.get("cep", ""))
+            if len(cep) != 8:
+                continue
+            batch.append(
+                (cep, values["street"], values["complement"], values["neighborhood"], values["city"], values["state"])
+            )
+            if len(batch) >= batch_size:
+                total += _insert(connection, batch)
+                batch = []
+        total += _insert(connection, batch)
+    connection.close()
+    return total
+
+
+def _insert(connection: sqlite3.Connection, rows) -> int:
+    if not rows:
+        return 0
+    with connection:
+        connection.executemany("INSERT OR REPLACE INTO ceps VALUES (?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python -m app.services.cep_dataset <arquivo.csv> <base.sqlite>")
+        sys.exit(1)
+    print(f"{load_csv(sys.argv[1], sys.argv[2])} CEPs importados em {sys.argv[2]}")
@@ -1,28 +1,75 @@
+from typing import Any, Dict, Optional
+import os
 import httpx
 from app.exceptions import APIException
+from app.services.cep_dataset import CepDataset, normalize_cep
+from app.services.http_client import http_pool
+from app.services.metrics import register_cache, register_client, track_upstream
+from app.services.shared_cache import make_cache
+from app.utils.json_codec import json_loads
+
+cep_cache = make_cache(
+    "cep",
+    ttl=float(os.getenv("CEP_CACHE_TTL", "604800")),
+    max_size=int(os.getenv("CEP_CACHE_SIZE", "50000")),
+)
+CEP_NEGATIVE_CACHE_TTL = float(os.getenv("CEP_NEGATIVE_CACHE_TTL", "3600"))
+cep_dataset = CepDataset.from_env()
+register_cache("cep", cep_cache)
+register_client("viacep", lambda: http_pool.viacep_client)
+
+def _address_ttl(address: Optional[Dict[str, Any]]) -> Optional[float]:
+    # CEPs inexistentes ficam em cache como None, por menos tempo.
+    return CEP_NEGATIVE_CACHE_TTL if address is None else None
+
+
+def _not_found() -> APIException:
+    return APIException("CEP não encontrado", status_code=404, error_type="NotFoundError")
+
 
 class ViaCEPService:
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, dataset: Optional[CepDataset] = None):
         self.base_url = "https://viacep.com.br/ws"
+        self.client = client or http_pool.get_viacep_client()
+        self.dataset = dataset or cep_dataset
 
     async def get_address(self, cep: str):
+        key = normalize_cep(cep)
+        # Consultas simultâneas ao mesmo CEP (nos outros workers também, com o
+        # cache compartilhado) fazem uma única busca.
+        address = await cep_cache.get_or_compute(
+            key, lambda: self._load_address(key), ttl=_address_ttl
+        )
+        if address is None:
+            raise _not_found()
+        return dict(address)
+
+    async def _load_address(self, cep: str) -> Optional[Dict[str, Any]]:
+        if self.dataset is not None:
+            address = self.dataset.lookup(cep)
+            if address is not None:
+                return address
+        return await self._fetch_address(cep)
+
+    async def _fetch_address(self, cep: str) -> Optional[Dict[str, Any]]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/{cep}/json/")
-                response.raise_for_status()
-                data = response.json()
-
-                if "erro" in data:
-                    raise APIException("CEP não encontrado", status_code=404, error_type="NotFoundError")
-
-                return {
-                    "city": data["localidade"],
-                    "neighborhood": data["bairro"],
-                    "state": data["uf"],
-                    "street": data["logradouro"],
-                    "zipcode": data["cep"],
-                    "complement": data["complemento"],
-                }
+            with track_upstream("viacep") as call:
+                response = await self.client.get(f"{self.base_url}/{cep}/json/")
+                call.status = response.status_code
+            response.raise_for_status()
+            data = json_loads(response.content)
+
+            if "erro" in data:
+                return None
+
+            return {
+                "city": data["localidade"],
+                "neighborhood": data["bairro"],
+                "state": data["uf"],
+                "street": data["logradouro"],
+                "zipcode": data["cep"],
+                "complement": data["complemento"],
+            }
 
         except httpx.HTTPStatusError as e:
             raise APIException(f"Erro ao buscar CEP: {str(e)}", status_code=e.response.status_code, error_type="HTTPError")
@@ -0,0 +1,110 @@
+from collections import deque
+from typing import Any, Dict, Optional
+from app.config import endpoint_setting
+from app.exceptions import BotProposalInfoException
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(BotProposalInfoException):
+    def __init__(self, endpoint: str, retry_after: float):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(
+            f"Serviço do banco indisponível ({endpoint}), tente novamente em {int(retry_after) + 1}s"
+        )
+
+
+class CircuitBreaker:
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.failure_rate = endpoint_setting("CIRCUIT", endpoint, "FAILURE_RATE", "0.5")
+        self.slow_call_seconds = endpoint_setting("CIRCUIT", endpoint, "SLOW_CALL_SECONDS", "10")
+        self.min_calls = int(endpoint_setting("CIRCUIT", endpoint, "MIN_CALLS", "10"))
+        self.window_size = int(endpoint_setting("CIRCUIT", endpoint, "WINDOW", "20"))
+        self.open_seconds = endpoint_setting("CIRCUIT", endpoint, "OPEN_SECONDS", "30")
+        self.half_open_calls = int(endpoint_setting("CIRCUIT", endpoint, "HALF_OPEN_CALLS", "1"))
+        self.state = CLOSED
+        self.window = deque(maxlen=self.window_size)
+        self.opened_at = 0.0
+        self.probes = 0
+        self.rejected = 0
+
+    def acquire(self):
+        if self.state == OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.open_seconds:
+                self.rejected += 1
+                raise CircuitOpenError(self.endpoint, self.open_seconds - elapsed)
+            self.state = HALF_OPEN
+            self.probes = 0
+
+        if self.state == HALF_OPEN:
+            if self.probes >= self.half_open_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.endpoint, self.open_seconds)
+            self.probes += 1
+
+    def record(self, failed: Optional[bool], elapsed: float):
+        if failed is None:
+            if self.state == HALF_OPEN:
+                self.probes = max(0, self.probes - 1)
+            return
+
+        failed = failed or elapsed >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            if failed:
+                self._open()
+            else:
+                self.state = CLOSED
+                self.window.clear()
+            return
+
+        self.window.append(failed)
+        if len(self.window) >= self.min_calls and self._failure_ratio() >= self.failure_rate:
+            self._open()
+
+    def _failure_ratio(self) -> float:
+        return sum(self.window) / len(self.window) if self.window else 0.0
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.window.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failure_ratio": round(self._failure_ratio(), 4),
+            "calls_in_window": len(self.window),
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakers:
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint)
+            self.breakers[endpoint] = breaker
+        return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+
+
+def is_circuit_open(error: Optional[BaseException]) -> bool:
+    while error is not None:
+        if isinstance(error, CircuitOpenError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+circuit_breakers = CircuitBreakers()
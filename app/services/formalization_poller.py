@@ -0,0 +1,120 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.services.retry_policy import run_detached
+import asyncio
+import os
+
+Fetch = Callable[[], Awaitable[Optional[str]]]
+
+
+class FormalizationPoller:
+    def __init__(
+        self,
+        fetch: Fetch,
+        min_interval: float,
+        max_interval: float,
+        on_done: Optional[Callable[[], None]] = None,
+    ):
+        self.fetch = fetch
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.on_done = on_done
+        self.waiters: List[asyncio.Future] = []
+        self.task: Optional[asyncio.Task] = None
+
+    async def wait_for(self, timeout: float) -> Optional[str]:
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        if self.task is None or self.task.done():
+            self.task = run_detached(self._run())
+            if self.on_done is not None:
+                self.task.add_done_callback(lambda _: self.on_done())
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if future in self.waiters:
+                self.waiters.remove(future)
+
+    async def _run(self):
+        # Uma única consulta ao banco por vez, com intervalo crescente, serve
+        # todos os clientes aguardando a mesma proposta. Só o "ainda não
+        # existe" (fetch devolve None) é repetido; qualquer erro vai direto
+        # para quem está aguardando.
+        interval = self.min_interval
+        while self.waiters:
+            try:
+                link = await self.fetch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                self._resolve(error=error)
+                return
+
+            if link:
+                self._resolve(link)
+                return
+
+            if not self.waiters:
+                return
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.max_interval)
+
+    def _resolve(self, link: Optional[str] = None, error: Optional[Exception] = None):
+        for future in self.waiters:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(link)
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    async def close(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+
+class FormalizationPollers:
+    def __init__(self):
+        self.min_interval = float(os.getenv("FORMALIZATION_POLL_MIN_INTERVAL", "1"))
+        self.max_interval = float(os.getenv("FORMALIZATION_POLL_MAX_INTERVAL", "10"))
+        self.max_wait = float(os.getenv("FORMALIZATION_MAX_WAIT", "60"))
+        self.pollers: Dict[Any, FormalizationPoller] = {}
+
+    async def wait_for(
+        self, key: Any, fetch: Fetch, timeout: float
+    ) -> Tuple[Optional[str], Optional[Exception]]:
+        # O poller só sai do registro quando não há quem aguarde nem consulta
+        # em andamento: nunca há duas consultas simultâneas para a mesma chave.
+        poller = self.pollers.get(key)
+        if poller is None:
+            poller = FormalizationPoller(
+                fetch,
+                self.min_interval,
+                self.max_interval,
+                on_done=lambda: self._discard(key, poller),
+            )
+            self.pollers[key] = poller
+        try:
+            return await poller.wait_for(min(timeout, self.max_wait)), None
+        except Exception as error:
+            return None, error
+        finally:
+            self._discard(key, poller)
+
+    def _discard(self, key: Any, poller: FormalizationPoller):
+        if not poller.waiters and not poller.running and self.pollers.get(key) is poller:
+            del self.pollers[key]
+
+    async def close(self):
+        for poller in self.pollers.values():
+            await poller.close()
+        self.pollers.clear()
+
+
+formalization_pollers = FormalizationPollers()
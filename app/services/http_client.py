@@ -0,0 +1,105 @@
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from app.config import env_bool
+from app.utils import get_logger
+import httpx
+import os
+
+logger = get_logger(__name__)
+
+
+PRATA_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9,pt-BR;q=0.8,pt;q=0.7",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Referer": "https://api.bancoprata.com.br/",
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin",
+    "Sec-Fetch-User": "?1",
+    "Sec-Ch-Ua": '"Google Chrome";v="123", "Not:A-Brand";v="8", "Chromium";v="123"',
+    "Sec-Ch-Ua-Mobile": "?0",
+    "Sec-Ch-Ua-Platform": '"Windows"',
+    "Upgrade-Insecure-Requests": "1",
+    "Cache-Control": "max-age=0",
+}
+
+
+def _shared_cookie_jar() -> CookieJar:
+    # O cliente é compartilhado entre contas: ele nunca guarda cookies,
+    # cada serviço mantém o seu próprio jar e o envia por requisição.
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+class HttpClientPool:
+    def __init__(self):
+        self.proxy_url = os.getenv("PROXY_URL") or None
+        self.max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+        self.max_keepalive_connections = int(
+            os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+        )
+        self.keepalive_expiry = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+        self.timeout = float(os.getenv("HTTP_TIMEOUT", "30"))
+        self.http2 = env_bool("HTTP_HTTP2")
+        self.prata_client = None
+        self.viacep_client = None
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def _http2_enabled(self) -> bool:
+        if not self.http2:
+            return False
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning(
+                "HTTP_HTTP2 ativo, mas o pacote h2 não está instalado (httpx[http2]): usando HTTP/1.1"
+            )
+            self.http2 = False
+            return False
+        return True
+
+    def build_client(self, **kwargs) -> httpx.AsyncClient:
+        # Mesmos limites, timeout e política de cookies para qualquer cliente
+        # extra (proxies do pool, transportes de teste).
+        return httpx.AsyncClient(
+            cookies=_shared_cookie_jar(),
+            limits=self._limits(),
+            http2=self._http2_enabled(),
+            timeout=self.timeout,
+            **kwargs,
+        )
+
+    def get_prata_client(self) -> httpx.AsyncClient:
+        if self.prata_client is None or self.prata_client.is_closed:
+            self.prata_client = self.build_client(
+                proxy=self.proxy_url, headers=PRATA_HEADERS
+            )
+        return self.prata_client
+
+    def get_viacep_client(self) -> httpx.AsyncClient:
+        if self.viacep_client is None or self.viacep_client.is_closed:
+            self.viacep_client = self.build_client()
+        return self.viacep_client
+
+    async def start(self, prata: bool = True):
+        # Com o pool de proxies o cliente do PROXY_URL não é usado.
+        if prata:
+            self.get_prata_client()
+        self.get_viacep_client()
+
+    async def close(self):
+        for client in (self.prata_client, self.viacep_client):
+            if client is not None and not client.is_closed:
+                await client.aclose()
+        self.prata_client = None
+        self.viacep_client = None
+
+
+http_pool = HttpClientPool()
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.exceptions import APIException
+from app.utils.logger import request_id_var
+import asyncio
+import os
+import time
+import uuid
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, kind: str, func: Callable[[], Awaitable[Any]]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.func = func
+        self.status = PENDING
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.request_id = request_id_var.get()
+        self.done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": str(self.error) if self.error is not None else None,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    def __init__(self):
+        self.workers = int(os.getenv("JOBS_WORKERS", "20"))
+        self.max_jobs = int(os.getenv("JOBS_MAX", "10000"))
+        self.ttl = float(os.getenv("JOBS_TTL", "600"))
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        if self.tasks:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_jobs)
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.queue = None
+
+    async def submit(self, kind: str, func: Callable[[], Awaitable[Any]]) -> Job:
+        await self.start()
+        self._purge()
+        if len(self.jobs) >= self.max_jobs:
+            raise APIException(
+                "Muitos processamentos em andamento, tente novamente mais tarde",
+                status_code=503,
+                error_type="JobQueueFull",
+            )
+        job = Job(kind, func)
+        self.jobs[job.id] = job
+        self.queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge()
+        return self.jobs.get(job_id)
+
+    def _purge(self):
+        # Jobs terminados expiram após o TTL; com o limite atingido, os
+        # terminados mais antigos saem primeiro.
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.finished and now - job.finished_at >= self.ttl:
+                del self.jobs[job_id]
+        if len(self.jobs) >= self.max_jobs:
+            for job_id, job in list(self.jobs.items()):
+                if len(self.jobs) < self.max_jobs:
+                    break
+                if job.finished:
+                    del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            job.status = RUNNING
+            token = request_id_var.set(job.request_id)
+            try:
+                job.result = await job.func()
+                job.status = DONE
+            except asyncio.CancelledError:
+                job.error = APIException("Processamento cancelado", status_code=503)
+                job.status = FAILED
+                raise
+            except Exception as error:
+                job.error = error
+                job.status = FAILED
+            finally:
+                job.func = None
+                job.finished_at = time.time()
+                job.done.set()
+                request_id_var.reset(token)
+                self.queue.task_done()
+
+
+job_manager = JobManager()
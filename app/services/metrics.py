@@ -0,0 +1,241 @@
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from prometheus_client import REGISTRY, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from app.utils import get_logger
+import httpx
+import time
+
+logger = get_logger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Latência das requisições recebidas pela API",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "api_requests_in_flight", "Requisições em andamento na API", ["method"]
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Latência das chamadas aos serviços externos",
+    ["endpoint", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "upstream_requests_in_flight", "Chamadas externas em andamento", ["endpoint"]
+)
+
+
+class UpstreamCall:
+    def __init__(self):
+        self.status = "error"
+
+
+@contextmanager
+def track_upstream(endpoint: str) -> Iterator[UpstreamCall]:
+    call = UpstreamCall()
+    in_flight = UPSTREAM_IN_FLIGHT.labels(endpoint)
+    in_flight.inc()
+    started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        elapsed = time.perf_counter() - started
+        in_flight.dec()
+        UPSTREAM_LATENCY.labels(endpoint, str(call.status)).observe(elapsed)
+        logger.debug(
+            "Chamada externa",
+            extra={"endpoint": endpoint, "status": call.status, "latency_ms": round(elapsed * 1000, 1)},
+        )
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            # O template da rota (ex.: /api/v1/jobs/{job_id}) só existe após o roteamento.
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(method, route_path, str(status["code"])).observe(
+                time.perf_counter() - started
+            )
+
+
+class ServiceCollector:
+    def __init__(self):
+        self.caches: Dict[str, object] = {}
+        self.clients: Dict[str, Callable[[], Optional[httpx.AsyncClient]]] = {}
+        self.breakers = None
+        self.rate_limiter = None
+        self.proxy_pool = None
+        self.retry_stats = None
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Acertos de cache", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Falhas de cache", labels=["cache"])
+        size = GaugeMetricFamily("cache_size", "Entradas em cache", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Taxa de acerto do cache", labels=["cache"])
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            size.add_metric([name], stats["size"])
+            ratio.add_metric([name], stats["hit_ratio"])
+        yield from (hits, misses, size, ratio)
+
+        connections = GaugeMetricFamily(
+            "http_pool_connections", "Conexões no pool HTTP", labels=["client", "state"]
+        )
+        limit = GaugeMetricFamily(
+            "http_pool_max_connections", "Limite de conexões do pool HTTP", labels=["client"]
+        )
+        for name, get_client in self.clients.items():
+            pools = _connection_pools(get_client())
+            if not pools:
+                continue
+            total = sum(len(pool.connections) for pool in pools)
+            idle = sum(
+                1 for pool in pools for connection in pool.connections if connection.is_idle()
+            )
+            connections.add_metric([name, "active"], total - idle)
+            connections.add_metric([name, "idle"], idle)
+            limit.add_metric(
+                [name], sum(getattr(pool, "_max_connections", 0) or 0 for pool in pools)
+            )
+        yield from (connections, limit)
+
+        if self.breakers is not None:
+            state = GaugeMetricFamily(
+                "circuit_breaker_open",
+                "Estado do circuit breaker (0 fechado, 1 semiaberto, 2 aberto)",
+                labels=["endpoint"],
+            )
+            levels = {"closed": 0, "half_open": 1, "open": 2}
+            for endpoint, snapshot in self.breakers.snapshot().items():
+                state.add_metric([endpoint], levels[snapshot["state"]])
+            yield state
+
+        if self.rate_limiter is not None:
+            queued = GaugeMetricFamily(
+                "rate_limit_queued", "Chamadas aguardando o limite de requisições", labels=["tenant"]
+            )
+            waited = CounterMetricFamily(
+                "rate_limit_wait_seconds", "Tempo total de espera pelo limite de requisições", labels=["tenant"]
+            )
+            rejected = CounterMetricFamily(
+                "rate_limit_rejected", "Chamadas recusadas por esgotar o prazo na fila", labels=["tenant"]
+            )
+            for tenant, snapshot in self.rate_limiter.snapshot()["tenants"].items():
+                queued.add_metric([tenant], snapshot["queued"])
+                waited.add_metric([tenant], snapshot["wait_seconds"])
+                rejected.add_metric([tenant], snapshot["rejected"])
+            yield from (queued, waited, rejected)
+
+        if self.retry_stats is not None:
+            snapshot = self.retry_stats.snapshot()
+            retries = CounterMetricFamily("upstream_retries", "Chamadas externas repetidas", labels=["endpoint"])
+            sleep = CounterMetricFamily(
+                "upstream_retry_sleep_seconds", "Tempo total de espera entre tentativas", labels=["endpoint"]
+            )
+            gave_up = CounterMetricFamily(
+                "upstream_retries_exhausted", "Falhas repetíveis que esgotaram as tentativas ou o prazo", labels=["endpoint"]
+            )
+            deadline = CounterMetricFamily(
+                "upstream_retries_deadline_exhausted", "Tentativas interrompidas pelo prazo da requisição", labels=["endpoint"]
+            )
+            for endpoint, stats in snapshot["endpoints"].items():
+                retries.add_metric([endpoint], stats["retries"])
+                sleep.add_metric([endpoint], stats["sleep_seconds"])
+                gave_up.add_metric([endpoint], stats["gave_up"])
+                deadline.add_metric([endpoint], stats["deadline_exhausted"])
+            deadlines = snapshot["deadlines"]
+            budgets = CounterMetricFamily("request_deadlines", "Requisições executadas com prazo")
+            budgets.add_metric([], deadlines["count"])
+            exhausted = CounterMetricFamily("request_deadlines_exhausted", "Requisições que consumiram todo o prazo")
+            exhausted.add_metric([], deadlines["exhausted"])
+            used = CounterMetricFamily("request_deadline_used_seconds", "Tempo total consumido dos prazos")
+            used.add_metric([], deadlines["used_seconds"])
+            yield from (retries, sleep, gave_up, deadline, budgets, exhausted, used)
+
+        if self.proxy_pool is not None and self.proxy_pool.enabled:
+            healthy = GaugeMetricFamily("proxy_healthy", "Proxy em uso no pool (1) ou removido (0)", labels=["proxy"])
+            latency = GaugeMetricFamily(
+                "proxy_latency_seconds", "Latência recente (média móvel) pelo proxy", labels=["proxy"]
+            )
+            requests = CounterMetricFamily("proxy_requests", "Chamadas feitas pelo proxy", labels=["proxy"])
+            errors = CounterMetricFamily("proxy_errors", "Falhas de conexão pelo proxy", labels=["proxy"])
+            for name, snapshot in self.proxy_pool.snapshot()["proxies"].items():
+                healthy.add_metric([name], 1 if snapshot["healthy"] else 0)
+                if snapshot["latency_ms"] is not None:
+                    latency.add_metric([name], snapshot["latency_ms"] / 1000)
+                requests.add_metric([name], snapshot["requests"])
+                errors.add_metric([name], snapshot["errors"])
+            yield from (healthy, latency, requests, errors)
+
+
+def _connection_pools(client: Optional[httpx.AsyncClient]) -> List:
+    # O httpx não expõe os pools publicamente; com proxy eles ficam nos "mounts".
+    if client is None or client.is_closed:
+        return []
+    transports = list(getattr(client, "_mounts", {}).values()) or [getattr(client, "_transport", None)]
+    pools = [getattr(transport, "_pool", None) for transport in transports]
+    return [pool for pool in pools if pool is not None and hasattr(pool, "connections")]
+
+
+service_collector = ServiceCollector()
+REGISTRY.register(service_collector)
+
+
+def register_cache(name: str, cache):
+    service_collector.caches[name] = cache
+
+
+def register_client(name: str, get_client: Callable[[], Optional[httpx.AsyncClient]]):
+    service_collector.clients[name] = get_client
+
+
+def register_breakers(breakers):
+    service_collector.breakers = breakers
+
+
+def register_rate_limiter(limiter):
+    service_collector.rate_limiter = limiter
+
+
+def register_retry_stats(stats):
+    service_collector.retry_stats = stats
+
+
+def register_proxy_pool(pool):
+    service_collector.proxy_pool = pool
+
+
+def render_metrics() -> bytes:
+    return generate_latest(REGISTRY)
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
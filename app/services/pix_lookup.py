@@ -0,0 +1,64 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from app.exceptions import BotProposalInfoException
+from app.services.metrics import register_cache
+from app.services.shared_cache import make_cache
+from app.utils.json_codec import json_loads
+import httpx
+import json
+import os
+
+PixAccount = Dict[str, Any]
+Fetch = Callable[[], Awaitable[Optional[PixAccount]]]
+
+
+def parse_pix_account(response: httpx.Response) -> Optional[PixAccount]:
+    try:
+        pix_data = json_loads(response.content)
+    except json.JSONDecodeError:
+        if response.text.strip() == "":
+            raise BotProposalInfoException("Received empty response from server")
+        raise BotProposalInfoException(
+            f"Received non-JSON response: {response.text[:100]}..."
+        )
+    if not isinstance(pix_data, dict) or not pix_data.get("data"):
+        return None
+    return pix_data["data"]
+
+
+def create_pix_resume(account: PixAccount) -> Dict[str, Any]:
+    return {
+        "bank_name": account["bankName"],
+        "client_name": account["name"],
+        "account_number": account["accountNumber"],
+        "branch_code": account["branchCode"],
+        "bank_id": account["bank_id"],
+        "account_created_at": account["created"],
+        "account_type": "Corrente",
+        "input_type": "pix",
+    }
+
+
+class PixLookup:
+    def __init__(self, ttl: float, negative_ttl: float, max_size: int):
+        self.negative_ttl = negative_ttl
+        self.cache = make_cache("pix", ttl=ttl, max_size=max_size)
+
+    def _ttl(self, account: Optional[PixAccount]) -> Optional[float]:
+        # Chave sem conta (404) fica em cache como None, por menos tempo.
+        return self.negative_ttl if account is None else None
+
+    async def get(self, key: Hashable, fetch: Fetch) -> Optional[PixAccount]:
+        # Consultas simultâneas à mesma chave fazem uma única chamada ao banco;
+        # erros não ficam em cache.
+        return await self.cache.get_or_compute(key, fetch, ttl=self._ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+pix_lookup = PixLookup(
+    ttl=float(os.getenv("PIX_CACHE_TTL", "120")),
+    negative_ttl=float(os.getenv("PIX_NEGATIVE_CACHE_TTL", "60")),
+    max_size=int(os.getenv("PIX_CACHE_SIZE", "10000")),
+)
+register_cache("pix", pix_lookup.cache)
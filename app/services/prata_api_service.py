@@ -1,19 +1,69 @@
-from typing import Dict, Any
-from app.utils import format_result, format_cpf, format_date, format_phone
+from typing import AsyncIterator, Dict, Any, List, Optional
+from app.utils import (
+    format_result,
+    format_cpf,
+    format_date,
+    format_phone,
+    get_logger,
+    validate_cpf,
+)
+from app.utils.json_codec import json_loads
 from app.exceptions import BotProposalInfoException, BotUnauthorizedException
+from app.config import env_bool
+from app.services.http_client import http_pool
+from app.services.session_registry import session_registry
+from app.services.wait_list_poller import wait_list_pollers
+from app.services.shared_cache import make_cache
+from app.services.stage_executor import Stage, StageExecutor, proposal_stage_stats
+from app.services.circuit_breaker import circuit_breakers
+from app.services.formalization_poller import formalization_pollers
+from app.services.pix_lookup import create_pix_resume, parse_pix_account, pix_lookup
+from app.services.rate_limiter import rate_limiter
+from app.services.proxy_pool import proxy_pool
+from app.services.metrics import (
+    register_breakers,
+    register_cache,
+    register_client,
+    register_rate_limiter,
+    register_retry_stats,
+    track_upstream,
+)
+from app.services.proposal_journal import proposal_journal, request_fingerprint
+from app.services.retry_policy import (
+    deadline_scope,
+    remaining_budget,
+    retry_policies,
+    retry_stats,
+)
 import httpx
-from dotenv import load_dotenv
-import traceback
-import os
 import json
 import asyncio
+import os
+import time
+
 
-load_dotenv()
+logger = get_logger(__name__)
+
+simulation_cache = make_cache(
+    "simulation",
+    ttl=float(os.getenv("SIMULATION_CACHE_TTL", "300")),
+    max_size=int(os.getenv("SIMULATION_CACHE_SIZE", "10000")),
+)
+formalization_links = make_cache(
+    "formalization",
+    ttl=float(os.getenv("FORMALIZATION_LINK_TTL", "2592000")),
+    max_size=int(os.getenv("FORMALIZATION_LINK_CACHE_SIZE", "100000")),
+)
+register_cache("simulation", simulation_cache)
+register_cache("formalization", formalization_links)
+register_client("prata", lambda: http_pool.prata_client)
+register_breakers(circuit_breakers)
+register_rate_limiter(rate_limiter)
+register_retry_stats(retry_stats)
 
 
 class PrataApiService:
-    def __init__(self):
-        self.proxy_url = os.getenv("PROXY_URL")
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.login_url = "https://api.bancoprata.com.br/v1/users/login"
         self.simulate_proposal_url = (
             "https://api.bancoprata.com.br/v1/qitech/fgts/balance"
@@ -36,103 +86,228 @@ class PrataApiService:
         self.formalization_url = (
             "https://api.bancoprata.com.br/v1/anti-fraud?account_id="
         )
-        self.retry_attempts = 3
-        self.retry_delay = 5
+        self.endpoints = {
+            self.login_url: "login",
+            self.simulate_proposal_url: "balance",
+            self.status_url: "wait_list",
+            self.pix_url: "pix",
+            self.first_stage: "account",
+            self.second_stage: "qualification",
+            self.third_stage: "address",
+            self.fourth_stage: "bank_account",
+            self.send_proposal_url: "proposal",
+            self.formalization_url.split("?")[0]: "anti_fraud",
+        }
+        self.wait_list_timeout = float(os.getenv("WAIT_LIST_TIMEOUT", "10"))
+        self.simulation_deadline = float(os.getenv("SIMULATION_DEADLINE", "30"))
+        self.proposal_deadline = float(os.getenv("PROPOSAL_DEADLINE", "60"))
+        self.speculative_check_value = env_bool("PRATA_SPECULATIVE_CHECK_VALUE")
+        self.batch_concurrency = int(os.getenv("BATCH_SIMULATION_CONCURRENCY", "10"))
         self.token = None
-        self.client = None
+        # Com PROXY_URLS cada chamada sai por um proxy do pool; um cliente
+        # passado explicitamente é usado como está.
+        self.proxies = proxy_pool if client is None and proxy_pool.enabled else None
+        if client is None and self.proxies is None:
+            client = http_pool.get_prata_client()
+        self.client = client
         self.cookies = httpx.Cookies()
+        self.session = None
+        self.bank_access = None
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self.proxies is None:
+            request = self.client.build_request(method, url, **kwargs)
+            self.cookies.set_cookie_header(request)
+            return await self.client.send(request)
+
+        proxy = self.proxies.choose(self._tenant())
+        client = proxy.get_client()
+        request = client.build_request(method, url, **kwargs)
+        self.cookies.set_cookie_header(request)
+        started = time.perf_counter()
+        try:
+            response = await client.send(request)
+        except httpx.RequestError as error:
+            self.proxies.record(proxy, time.perf_counter() - started, error)
+            raise
+        self.proxies.record(proxy, time.perf_counter() - started)
+        return response
 
-    async def _make_request(self, method: str, url: str, **kwargs) -> httpx.Response:
-        headers_agent = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "en-US,en;q=0.9,pt-BR;q=0.8,pt;q=0.7",
-            "Accept-Encoding": "gzip, deflate",
-            "Connection": "keep-alive",
-            "Referer": "https://api.bancoprata.com.br/",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-origin",
-            "Sec-Fetch-User": "?1",
-            "Sec-Ch-Ua": '"Google Chrome";v="123", "Not:A-Brand";v="8", "Chromium";v="123"',
-            "Sec-Ch-Ua-Mobile": "?0",
-            "Sec-Ch-Ua-Platform": '"Windows"',
-            "Upgrade-Insecure-Requests": "1",
-            "Cache-Control": "max-age=0",
-        }
-        if self.client is None:
-            self.client = httpx.AsyncClient(
-                proxies={"http://": self.proxy_url, "https://": self.proxy_url},
-                headers=headers_agent,
-                cookies=self.cookies,
-                timeout=30.0,
-            )
+    def _tenant(self) -> str:
+        return self.session.username if self.session is not None else "anonymous"
 
-        try:
-            response = await self.client.request(method, url, **kwargs)
-            response.raise_for_status()
-            self.cookies.update(response.cookies)
+    def _endpoint_name(self, url: str) -> str:
+        return self.endpoints.get(url.split("?")[0], "other")
 
-            return response
+    async def _make_request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        endpoint = self._endpoint_name(url)
+        policy = retry_policies.get(endpoint)
+        attempt = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                attempt += 1
+                await rate_limiter.acquire(self._tenant(), endpoint)
+                self._apply_budget(kwargs)
+                try:
+                    return await self._request_once(endpoint, method, url, **kwargs)
+                except (httpx.HTTPStatusError, httpx.RequestError) as error:
+                    # Erros que não se repetem (ex.: 4xx de validação) não
+                    # contam como tentativas esgotadas.
+                    if not policy.is_retryable(method, error):
+                        raise
+                    delay = policy.next_delay(method, error, attempt)
+                    remaining = remaining_budget()
+                    if delay is None or (remaining is not None and delay >= remaining):
+                        retry_stats.record_give_up(endpoint, delay is not None)
+                        raise
+                    retry_stats.record_retry(endpoint, delay)
+                    await asyncio.sleep(delay)
         except httpx.HTTPStatusError as e:
-            traceback.print_exc()
             error_message = f"HTTP error: {e.response.status_code}"
             try:
-                error_data = e.response.json()
+                error_data = json_loads(e.response.content)
                 if isinstance(error_data, dict) and "error" in error_data:
                     error_message = error_data["error"].get("message", error_message)
             except json.JSONDecodeError:
                 error_message += f" - Response: {e.response.text}"
-            raise BotProposalInfoException(error_message)
+            logger.warning(
+                "Erro HTTP do banco",
+                extra={
+                    "endpoint": endpoint,
+                    "status": e.response.status_code,
+                    "attempts": attempt,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "error": error_message,
+                },
+            )
+            raise BotProposalInfoException(
+                error_message, status_code=e.response.status_code
+            )
         except httpx.RequestError as error:
+            logger.warning(
+                "Erro de conexão com o banco",
+                extra={
+                    "endpoint": endpoint,
+                    "attempts": attempt,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "error": f"{type(error).__name__}: {error}",
+                },
+            )
             raise BotProposalInfoException(f"Request error: {str(error)}")
+        except (BotUnauthorizedException, BotProposalInfoException):
+            raise
         except Exception as e:
             raise BotProposalInfoException(f"Unexpected error: {str(e)}")
 
+    def _apply_budget(self, kwargs: Dict[str, Any]):
+        remaining = remaining_budget()
+        if remaining is None:
+            return
+        if remaining <= 0:
+            raise BotProposalInfoException(
+                "Tempo limite da requisição esgotado, tente novamente mais tarde"
+            )
+        default_timeout = http_pool.timeout if self.client is None else self.client.timeout.read
+        timeout = kwargs.get("timeout", default_timeout)
+        kwargs["timeout"] = remaining if timeout is None else min(timeout, remaining)
+
+    async def _send_tracked(
+        self, endpoint: str, method: str, url: str, **kwargs
+    ) -> httpx.Response:
+        with track_upstream(endpoint) as call:
+            response = await self._send(method, url, **kwargs)
+            call.status = response.status_code
+            return response
+
+    async def _request_once(
+        self, endpoint: str, method: str, url: str, **kwargs
+    ) -> httpx.Response:
+        breaker = circuit_breakers.get(endpoint)
+        breaker.acquire()
+        started = time.perf_counter()
+        failed = None
+        try:
+            response = await self._send_tracked(endpoint, method, url, **kwargs)
+            if (
+                response.status_code == 401
+                and self.session is not None
+                and "Authorization" in kwargs.get("headers", {})
+            ):
+                await self._relogin(kwargs["headers"])
+                response = await self._send_tracked(endpoint, method, url, **kwargs)
+            failed = response.status_code >= 500
+            response.raise_for_status()
+            self.cookies.update(response.cookies)
+
+            return response
+        except httpx.RequestError:
+            failed = True
+            raise
+        finally:
+            breaker.record(failed, time.perf_counter() - started)
+
+    def _use_session(self, data: Dict[str, Any]):
+        self.bank_access = data["bank_access"]
+        self.session = session_registry.get_session(self.bank_access)
+        self.cookies = self.session.cookies
+
+    async def _relogin(self, headers: Dict[str, str]):
+        self.token = await session_registry.get_token(
+            self.session, self._login, rejected_token=self.token
+        )
+        headers["Authorization"] = f"Bearer {self.token}"
+
     async def authenticate(self, data: Dict[str, Any]) -> str:
-        if self.token:
-            return self.token
+        self._use_session(data)
+        self.token = await session_registry.get_token(self.session, self._login)
+        return self.token
+
+    async def _login(self) -> str:
         try:
-            user_data = data["bank_access"]
             payload = {
-                "email": user_data["username"],
-                "password": user_data["password"],
+                "email": self.bank_access["username"],
+                "password": self.bank_access["password"],
             }
             response = await self._make_request(
                 "POST", self.login_url, json=payload, timeout=10
             )
 
-            for encoding in ["utf-8", "latin-1", "iso-8859-1"]:
-                try:
-                    context = json.loads(response.content.decode(encoding))
-                    self.token = context["data"]["token"]
-                    return self.token
-                except UnicodeDecodeError:
-                    continue
-
-            raise BotUnauthorizedException(
-                "Não foi possível decodificar a resposta do servidor"
-            )
+            # O corpo é decodificado direto dos bytes; só uma resposta fora de
+            # UTF-8 é lida de novo como latin-1.
+            try:
+                context = json_loads(response.content)
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                context = json_loads(response.content.decode("latin-1"))
+            return context["data"]["token"]
 
+        except BotUnauthorizedException:
+            raise
         except BotProposalInfoException as e:
             raise BotUnauthorizedException(f"Erro de autenticação: {str(e)}")
         except Exception as e:
             raise BotUnauthorizedException(f"Erro inesperado: {str(e)}")
 
     async def get_auth_headers(self, data: Dict[str, Any]) -> Dict[str, str]:
-        if not self.token:
-            await self.authenticate(data)
+        await self.authenticate(data)
         return {"Authorization": f"Bearer {self.token}"}
 
     async def simulate_fgts(self, data: Dict[str, Any]) -> Dict[str, Any]:
         headers = await self.get_auth_headers(data)
         cpf = format_cpf(data["contact"]["cpf"])
 
+        # A consulta PIX não depende do saldo, então já sai junto com ele; a
+        # checagem com rate 16 só é antecipada quando configurado.
+        pix_task = asyncio.ensure_future(self.lookup_pix(data, cpf))
+        check_task = None
+        if self.speculative_check_value:
+            check_task = asyncio.ensure_future(self.fetch_check_value(data, cpf))
+
         try:
             response = await self._make_request(
                 "GET", f"{self.simulate_proposal_url}?document={cpf}", headers=headers
             )
-            result = response.json()
+            result = json_loads(response.content)
 
             if not result.get("data"):
                 raise BotProposalInfoException(
@@ -143,89 +318,127 @@ class PrataApiService:
                 raise BotProposalInfoException(result["data"]["status_reason"])
 
             if not result["data"].get("issue_amount"):
+                await self._cancel_tasks(pix_task, check_task)
                 return await self.fetch_filtered_status(data)
 
-            strategy_result = await self.fetch_check_value(data, cpf)
+            if check_task is None:
+                check_task = asyncio.ensure_future(self.fetch_check_value(data, cpf))
 
-            pix_result = await self.fetch_pix(data, cpf)
+            strategy_result, pix_account = await self._gather_tasks(
+                check_task, pix_task
+            )
 
-            if pix_result["data"]:
-                pix_resume = self.create_pix_resume(pix_result["data"])
-            else:
-                pix_resume = None
+            pix_resume = create_pix_resume(pix_account) if pix_account else None
 
             strategy_result["pix_resume"] = pix_resume
+            await simulation_cache.aset((self.session.username, cpf), strategy_result)
 
             return strategy_result
 
         except BotProposalInfoException as e:
-            traceback.print_exc()
+            logger.info("Simulação não concluída", extra={"error": str(e)})
             raise BotProposalInfoException(f"Erro na simulação: {str(e)}")
+        finally:
+            await self._cancel_tasks(pix_task, check_task)
 
-    async def fetch_filtered_status(self, data):
-        headers = await self.get_auth_headers(data)
-        cpf = format_cpf(data["contact"]["cpf"])
+    async def simulate_fgts_batch(
+        self, data: Dict[str, Any], concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        await self.get_auth_headers(data)
+        limit = max(1, min(concurrency or self.batch_concurrency, self.batch_concurrency))
 
-        for attempt in range(self.retry_attempts):
+        async def simulate(index, contact):
             try:
-                response = await self._make_request(
-                    "GET", f"{self.status_url}?product_id=3", headers=headers
+                # Um CPF inválido vira erro do item, sem chamada ao banco.
+                contact = {**contact, "cpf": validate_cpf(contact.get("cpf") or "")}
+                with deadline_scope(self.simulation_deadline):
+                    result = await self.simulate_fgts(
+                        {"contact": contact, "bank_access": data["bank_access"]}
+                    )
+                return {"index": index, "cpf": contact.get("cpf"), "status": "ok", "result": result}
+            except Exception as error:
+                return {"index": index, "cpf": contact.get("cpf"), "status": "error", "error": str(error)}
+
+        # Só há no máximo "limit" simulações em andamento; cada resultado é
+        # entregue assim que fica pronto, sem acumular o lote em memória.
+        contacts = enumerate(data["contacts"])
+        in_flight = set()
+        try:
+            for index, contact in contacts:
+                in_flight.add(asyncio.ensure_future(simulate(index, contact)))
+                if len(in_flight) < limit:
+                    continue
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
                 )
+                for task in done:
+                    yield task.result()
 
-                try:
-                    result = response.json()
-                except json.JSONDecodeError:
-
-                    if attempt < self.retry_attempts - 1:
-                        await asyncio.sleep(self.retry_delay)
-                        continue
-                    else:
-                        raise BotProposalInfoException(
-                            "Invalid JSON response from status endpoint"
-                        )
-
-                filtered_status_reasons = [
-                    item["status_reason"]
-                    for item in result.get("data", [])
-                    if item.get("document") == cpf and item.get("status_reason")
-                ]
-                if filtered_status_reasons:
-                    raise BotProposalInfoException(filtered_status_reasons[0])
-
-                if attempt < self.retry_attempts - 1:
-                    await asyncio.sleep(self.retry_delay)
-                else:
-                    raise BotProposalInfoException(
-                        "Status ainda não disponível, tentar novamente mais tarde"
-                    )
+            while in_flight:
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            await self._cancel_tasks(*in_flight)
 
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 403:
-                    raise BotProposalInfoException(
-                        "Acesso não autorizado ao status filtrado"
-                    )
-                elif attempt < self.retry_attempts - 1:
-                    await asyncio.sleep(self.retry_delay)
-                else:
-                    raise BotProposalInfoException(
-                        f"Erro ao buscar status: {e.response.status_code}"
-                    )
+    @staticmethod
+    async def _gather_tasks(*tasks: asyncio.Future) -> List[Any]:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        errors = [
+            task.exception()
+            for task in tasks
+            if task in done and not task.cancelled() and task.exception()
+        ]
+        if errors:
+            await PrataApiService._cancel_tasks(*pending)
+            if len(errors) == 1:
+                raise errors[0]
+            raise BotProposalInfoException("; ".join(str(error) for error in errors))
+        return [task.result() for task in tasks]
 
-            except httpx.RequestError:
-                if attempt < self.retry_attempts - 1:
-                    await asyncio.sleep(self.retry_delay)
-                else:
-                    raise BotProposalInfoException(
-                        "Erro ao buscar status, tente novamente mais tarde"
-                    )
+    @staticmethod
+    async def _cancel_tasks(*tasks: Optional[asyncio.Future]):
+        pending = [task for task in tasks if task is not None and not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        for task in tasks:
+            if task is not None and task.done() and not task.cancelled():
+                task.exception()
+
+    async def _get_simulation(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        await self.get_auth_headers(data)
+        cpf = format_cpf(data["contact"]["cpf"])
+        simulation_result = await simulation_cache.aget((self.session.username, cpf))
+        if simulation_result is None:
+            simulation_result = await self.simulate_fgts(data)
+        return simulation_result
 
-            except Exception as e:
-                if attempt < self.retry_attempts - 1:
-                    await asyncio.sleep(self.retry_delay)
-                else:
-                    raise BotProposalInfoException(f"{str(e)}")
+    async def fetch_filtered_status(self, data):
+        await self.get_auth_headers(data)
+        cpf = format_cpf(data["contact"]["cpf"])
 
-        raise BotProposalInfoException("Falha ao obter status após várias tentativas")
+        poller = wait_list_pollers.get(self.session.key, self._fetch_wait_list)
+        timeout = self.wait_list_timeout
+        remaining = remaining_budget()
+        if remaining is not None:
+            timeout = max(0.0, min(timeout, remaining))
+        status_reason = await poller.wait_for(cpf, timeout=timeout)
+        raise BotProposalInfoException(status_reason)
+
+    async def _fetch_wait_list(self) -> List[Dict[str, Any]]:
+        headers = await self.get_auth_headers({"bank_access": self.bank_access})
+        response = await self._make_request(
+            "GET", f"{self.status_url}?product_id=3", headers=headers
+        )
+        try:
+            result = json_loads(response.content)
+        except json.JSONDecodeError:
+            raise BotProposalInfoException("Invalid JSON response from status endpoint")
+        return result.get("data") or []
 
     async def fetch_check_value(self, data, cpf):
         headers = await self.get_auth_headers(data)
@@ -237,7 +450,7 @@ class PrataApiService:
             )
 
             try:
-                resume = response.json()
+                resume = json_loads(response.content)
             except json.JSONDecodeError:
                 if response.text.strip() == "":
                     raise BotProposalInfoException(
@@ -254,7 +467,17 @@ class PrataApiService:
         except Exception as e:
             raise BotProposalInfoException(f"Unexpected error: {str(e)}")
 
-    async def fetch_pix(self, data, cpf):
+    async def lookup_pix(self, data, cpf) -> Optional[Dict[str, Any]]:
+        # A conta PIX de um CPF é consultada uma vez e reaproveitada pela
+        # simulação e por /get_pix_infos; o cache só é lido depois de
+        # autenticar as credenciais recebidas.
+        await self.get_auth_headers(data)
+        cpf = format_cpf(cpf)
+        return await pix_lookup.get(
+            (self.session.username, cpf), lambda: self._fetch_pix(data, cpf)
+        )
+
+    async def _fetch_pix(self, data, cpf) -> Optional[Dict[str, Any]]:
         headers = await self.get_auth_headers(data)
         try:
             response = await self._make_request(
@@ -262,56 +485,18 @@ class PrataApiService:
                 f"{self.pix_url}?pix_key={cpf}&btn_clicked=true",
                 headers=headers,
             )
+        except BotProposalInfoException as e:
+            if e.status_code == 404:
+                return None
+            raise
+        return parse_pix_account(response)
 
-            try:
-                pix_data = response.json()
-            except json.JSONDecodeError:
-                if response.text.strip() == "":
-                    raise BotProposalInfoException(
-                        "Received empty response from server"
-                    )
-                else:
-                    raise BotProposalInfoException(
-                        f"Received non-JSON response: {response.text[:100]}..."
-                    )
-
-            if not pix_data.get("data"):
-                return {"data": None}
-
-            return pix_data
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                return {"data": None}
-            else:
-                try:
-                    error_data = e.response.json()
-                    raise BotProposalInfoException(error_data)
-                except json.JSONDecodeError:
-                    raise BotProposalInfoException(
-                        f"HTTP error {e.response.status_code}: {e.response.text[:100]}..."
-                    )
-        except httpx.RequestError as error:
-            raise BotProposalInfoException(f"{str(error)}")
-        except Exception as e:
-            raise BotProposalInfoException(f" {str(e)}")
-
-    async def send_proposal_pix(self, data):
+    async def send_proposal_pix(self, data, idempotency_key: Optional[str] = None):
         try:
             headers = await self.get_auth_headers(data)
             cpf = format_cpf(data["contact"]["cpf"])
 
-            simulation_result = await self.simulate_fgts(data)
-            common_fields = {
-                "contract_balance": simulation_result["contract_balance"],
-                "amount_released": simulation_result["amount_released"],
-            }
-
-            account_id = await self._send_first_stage(data, headers)
-            await self._send_second_stage(data, headers, account_id)
-            await self._send_third_stage(data, headers, account_id)
-
             pix_fields = {
-                **common_fields,
                 "account_number": data["pix_resume"]["account_number"],
                 "account_type": data["pix_resume"]["account_type"],
                 "bank_id": data["pix_resume"]["bank_id"],
@@ -319,52 +504,136 @@ class PrataApiService:
                 "input_type": "pix",
                 "account_created_at": data["pix_resume"]["account_created_at"],
             }
-            await self._send_pix_stage(pix_fields, headers, account_id, cpf)
 
-            proposal = await self._send_last_stage(pix_fields, headers, account_id)
-            url = await self.get_formalization_url(
-                data, proposal["proposal_identifier"]
-            )
+            async def send_pix_stage(fields, account_id):
+                await self._send_pix_stage(fields, headers, account_id, cpf)
 
-            return {"resume": proposal["proposal_number"], "formalization_url": url}
+            return await self._run_proposal(
+                data, headers, pix_fields, send_pix_stage, idempotency_key
+            )
         except httpx.RequestError as e:
-            traceback.print_exc()
+            logger.warning("Erro de conexão ao enviar proposta", exc_info=True)
             raise BotProposalInfoException(str(e))
 
-    async def send_proposal_cc(self, data):
+    async def send_proposal_cc(self, data, idempotency_key: Optional[str] = None):
         try:
             headers = await self.get_auth_headers(data)
 
-            simulation_result = await self.simulate_fgts(data)
-            common_fields = {
-                "contract_balance": simulation_result["contract_balance"],
-                "amount_released": simulation_result["amount_released"],
-            }
-
-            account_id = await self._send_first_stage(data, headers)
-            await self._send_second_stage(data, headers, account_id)
-            await self._send_third_stage(data, headers, account_id)
-
             bank_account_fields = {
-                **common_fields,
                 **data["bank_account_info"],
                 "input_type": "manual",
             }
-            await self._send_bank_account_stage(
-                bank_account_fields, headers, account_id
+
+            async def send_bank_account_stage(fields, account_id):
+                await self._send_bank_account_stage(fields, headers, account_id)
+
+            return await self._run_proposal(
+                data, headers, bank_account_fields, send_bank_account_stage, idempotency_key
             )
+        except httpx.RequestError as e:
+            logger.warning("Erro de conexão ao enviar proposta", exc_info=True)
+            raise BotProposalInfoException(str(e))
 
-            proposal = await self._send_last_stage(
-                bank_account_fields, headers, account_id
+    async def _run_proposal(
+        self, data, headers, payment_fields, send_payment_stage, idempotency_key=None
+    ):
+        if not idempotency_key:
+            return await self._execute_proposal(
+                data, headers, payment_fields, send_payment_stage
             )
-            url = await self.get_formalization_url(
-                data, proposal["proposal_identifier"]
+
+        # Com Idempotency-Key cada etapa concluída vai para o journal: uma nova
+        # tentativa retoma da primeira etapa pendente e um envio já concluído
+        # devolve o resultado gravado sem chamar o banco.
+        key = f"{data.get('send_method', '')}:{self.session.username}:{idempotency_key}"
+
+        async def record_stage(stage, result):
+            if stage == "formalization" and not isinstance(result, str):
+                return
+            await proposal_journal.record_stage(key, stage, result)
+
+        async with proposal_journal.claim(key, request_fingerprint(data)) as (stored, completed):
+            if stored is not None:
+                return stored
+
+            response = await self._execute_proposal(
+                data, headers, payment_fields, send_payment_stage, completed, record_stage
             )
+            if isinstance(response["formalization_url"], str):
+                await proposal_journal.finish(key, response)
+            return response
 
-            return {"resume": proposal["proposal_number"], "formalization_url": url}
-        except httpx.RequestError as e:
-            traceback.print_exc()
-            raise BotProposalInfoException(str(e))
+    async def _execute_proposal(
+        self,
+        data,
+        headers,
+        payment_fields,
+        send_payment_stage,
+        completed=None,
+        on_complete=None,
+    ):
+        def fields(results):
+            return {
+                "contract_balance": results["simulation"]["contract_balance"],
+                "amount_released": results["simulation"]["amount_released"],
+                **payment_fields,
+            }
+
+        # Qualificação, endereço e conta só dependem do account_id e rodam juntas.
+        executor = StageExecutor(
+            [
+                Stage("simulation", lambda results: self._get_simulation(data)),
+                Stage(
+                    "account",
+                    lambda results: self._send_first_stage(data, headers),
+                    ["simulation"],
+                ),
+                Stage(
+                    "qualification",
+                    lambda results: self._send_second_stage(
+                        data, headers, results["account"]
+                    ),
+                    ["account"],
+                ),
+                Stage(
+                    "address",
+                    lambda results: self._send_third_stage(
+                        data, headers, results["account"]
+                    ),
+                    ["account"],
+                ),
+                Stage(
+                    "bank_account",
+                    lambda results: send_payment_stage(
+                        fields(results), results["account"]
+                    ),
+                    ["simulation", "account"],
+                ),
+                Stage(
+                    "proposal",
+                    lambda results: self._send_last_stage(
+                        fields(results), headers, results["account"]
+                    ),
+                    ["qualification", "address", "bank_account"],
+                ),
+                Stage(
+                    "formalization",
+                    lambda results: self.get_formalization_url(
+                        data, results["proposal"]["proposal_identifier"]
+                    ),
+                    ["proposal"],
+                ),
+            ],
+            stats=proposal_stage_stats,
+            results=completed,
+            on_complete=on_complete,
+        )
+        results = await executor.run()
+
+        return {
+            "resume": results["proposal"]["proposal_number"],
+            "formalization_url": results["formalization"],
+        }
 
     async def _send_first_stage(self, data, headers):
         first_stage = {
@@ -454,71 +723,56 @@ class PrataApiService:
             response = await self._make_request(
                 "POST", url, json=data, headers=headers, timeout=10
             )
-            return response.json()
+            return json_loads(response.content)
         except BotProposalInfoException as error:
-            traceback.print_exc()
+            logger.warning(
+                "Erro ao enviar etapa da proposta",
+                extra={"endpoint": self._endpoint_name(url), "error": str(error)},
+            )
             raise BotProposalInfoException(str(error))
 
-    @staticmethod
-    def create_pix_resume(pix_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def get_formalization_url(self, data, proposal_id, wait: float = 0):
+        # Um link já encontrado não muda: é servido do cache sem nova chamada
+        # ao anti-fraude, mas só depois de autenticar quem pede.
+        await self.get_auth_headers(data)
+        key = (self.session.username, str(proposal_id))
+        link = await formalization_links.aget(key)
+        if link is not None:
+            return link
+
+        if wait > 0:
+            link, error = await formalization_pollers.wait_for(
+                key, lambda: self._fetch_formalization_url(data, key), wait
+            )
+        else:
+            try:
+                link, error = await self._fetch_formalization_url(data, key), None
+            except BotProposalInfoException as e:
+                link, error = None, e
+
+        if link is not None:
+            return link
+        if error is None:
+            return {
+                "status": "Not Found",
+                "message": "Ainda não foi possível encontrar o link de formalização, tente novamente mais tarde.",
+            }
         return {
-            "bank_name": pix_data["bankName"],
-            "client_name": pix_data["name"],
-            "account_number": pix_data["accountNumber"],
-            "branch_code": pix_data["branchCode"],
-            "bank_id": pix_data["bank_id"],
-            "account_created_at": pix_data["created"],
-            "account_type": "Corrente",
-            "input_type": "pix",
+            "status": "Error",
+            "message": f"Ocorreu um erro ao buscar o link de formalização. Erro: {str(error)}. Por favor, tente novamente mais tarde.",
         }
 
-    async def get_formalization_url(self, data, proposal_id):
-        try:
-            headers = await self.get_auth_headers(data)
-            url = f"{self.formalization_url}{proposal_id}"
-
-            response = await self._make_request("GET", url, headers=headers)
-            formalization = response.json()
-            return f"https://assina.bancoprata.com.br/validacao/{formalization['data']['token']}"
-
-        except BotProposalInfoException as e:
-            if "404" in str(e):
-                return {
-                    "status": "Not Found",
-                    "message": "Ainda não foi possível encontrar o link de formalização, tente novamente mais tarde.",
-                }
-            else:
-                return {
-                    "status": "Error",
-                    "message": f"Ocorreu um erro ao buscar o link de formalização. Erro: {str(e)}. Por favor, tente novamente mais tarde.",
-                }
-
-    async def get_pix(self, data, cpf):
+    async def _fetch_formalization_url(self, data, key) -> Optional[str]:
         headers = await self.get_auth_headers(data)
         try:
             response = await self._make_request(
-                "GET",
-                f"{self.pix_url}?pix_key={cpf}&btn_clicked=true",
-                headers=headers,
+                "GET", f"{self.formalization_url}{key[1]}", headers=headers
             )
-
-            try:
-                pix_data = response.json()
-            except json.JSONDecodeError:
-                if response.text.strip() == "":
-                    raise BotProposalInfoException(
-                        "Received empty response from server"
-                    )
-                else:
-                    raise BotProposalInfoException(
-                        f"Received non-JSON response: {response.text[:100]}..."
-                    )
-
-            if not pix_data.get("data"):
-                return {"data": None}
-
-            return {"data": pix_data["data"]}
-        except httpx.RequestError as error:
-            raise BotProposalInfoException(f"Error fetching PIX data: {str(error)}")
-        except Exception as e:
-            raise BotProposalInfoException(f"Unexpected error: {str(e)}")
+        except BotProposalInfoException as e:
+            if getattr(e, "status_code", None) == 404:
+                return None
+            raise
+        formalization = json_loads(response.content)
+        link = f"https://assina.bancoprata.com.br/validacao/{formalization['data']['token']}"
+        await formalization_links.aset(key, link)
+        return link
@@ -0,0 +1,47 @@
+from typing import Any, Dict, Optional, Tuple
+from app.utils.json_codec import json_dumps
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class PrerenderedResponse:
+    def __init__(self, content: Any):
+        # Mesmo codec das demais respostas da API.
+        self.body = json_dumps(content)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.variants: Dict[Optional[str], Tuple[bytes, str]] = {
+            None: (self.body, f'"{digest}"'),
+            "gzip": (gzip.compress(self.body, compresslevel=9, mtime=0), f'"{digest}-gzip"'),
+        }
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(self.body), f'"{digest}-br"')
+        self.etags = {etag for _, etag in self.variants.values()}
+
+    def select(self, accept_encoding: str) -> Tuple[Optional[str], bytes, str]:
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in accept_encoding.split(",")
+            if part.strip() and not part.replace(" ", "").endswith(";q=0")
+        }
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and encoding in accepted:
+                body, etag = self.variants[encoding]
+                return encoding, body, etag
+        body, etag = self.variants[None]
+        return None, body, etag
+
+    def matches(self, if_none_match: str) -> bool:
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == "*" or tag in self.etags:
+                return True
+        return False
@@ -0,0 +1,214 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from app.exceptions import APIException
+from app.services.retry_policy import remaining_budget
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+DONE = "done"
+CLAIMED = "claimed"
+BUSY = "busy"
+
+
+def request_fingerprint(data: Dict[str, Any]) -> str:
+    content = {key: value for key, value in data.items() if key != "bank_access"}
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    # BEGIN IMMEDIATE reserva a escrita já na leitura: entre workers, só um
+    # decide por vez quem fica com a chave.
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+class ProposalJournal:
+    def __init__(self, db_path: str, ttl: float, lease_ttl: float, poll_interval: float):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.owner = uuid.uuid4().hex
+        self.connection: Optional[sqlite3.Connection] = None
+        self.pid: Optional[int] = None
+        self.locks: Dict[str, List[Any]] = {}
+        # Uma única thread faz todo o acesso ao SQLite: o event loop nunca
+        # espera pelo disco nem pelo lock de outro worker.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="proposal-journal")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None or self.pid != os.getpid():
+            connection = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS proposals ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, result TEXT, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "owner TEXT, lease_expires_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(proposals)")}
+            if "owner" not in columns:
+                # Journals criados antes da lease entre workers.
+                connection.execute("ALTER TABLE proposals ADD COLUMN owner TEXT")
+                connection.execute(
+                    "ALTER TABLE proposals ADD COLUMN lease_expires_at REAL NOT NULL DEFAULT 0"
+                )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS proposal_stages ("
+                "key TEXT NOT NULL, stage TEXT NOT NULL, result TEXT, "
+                "finished_at REAL NOT NULL, PRIMARY KEY (key, stage))"
+            )
+            self.connection = connection
+            self.pid = os.getpid()
+        return self.connection
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    @asynccontextmanager
+    async def claim(
+        self, key: str, fingerprint: str
+    ) -> AsyncIterator[Tuple[Optional[Dict[str, Any]], Dict[str, Any]]]:
+        # Envios simultâneos com a mesma chave, no mesmo worker ou em outros,
+        # são serializados por uma lease no journal: quem chega depois aguarda
+        # e encontra o resultado gravado ou retoma as etapas pendentes.
+        entry = self.locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                stored, completed = await self._acquire(key, fingerprint)
+                if stored is not None:
+                    yield stored, {}
+                    return
+                try:
+                    yield None, completed
+                finally:
+                    await asyncio.shield(self._run(self._release, key))
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self.locks.pop(key, None)
+
+    async def _acquire(self, key: str, fingerprint: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        while True:
+            state, value = await self._run(self._try_claim, key, fingerprint)
+            if state == DONE:
+                return value, {}
+            if state == CLAIMED:
+                return None, value
+            remaining = remaining_budget()
+            if remaining is not None and remaining <= self.poll_interval:
+                raise APIException(
+                    "Proposta com a mesma Idempotency-Key em andamento, tente novamente em instantes",
+                    status_code=409,
+                    error_type="IdempotencyKeyInProgress",
+                )
+            await asyncio.sleep(self.poll_interval)
+
+    def _try_claim(self, key: str, fingerprint: str) -> Tuple[str, Any]:
+        now = time.time()
+        with _transaction(self._connect()) as connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO proposals "
+                "(key, fingerprint, result, created_at, updated_at, owner, lease_expires_at) "
+                "VALUES (?, ?, NULL, ?, ?, NULL, 0)",
+                (key, fingerprint, now, now),
+            )
+            row = connection.execute(
+                "SELECT fingerprint, result, owner, lease_expires_at FROM proposals WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row[0] != fingerprint:
+                raise APIException(
+                    "Idempotency-Key já utilizada com outro conteúdo de proposta",
+                    status_code=422,
+                    error_type="IdempotencyKeyReused",
+                )
+            if row[1] is not None:
+                return DONE, json.loads(row[1])
+            if row[2] is not None and row[2] != self.owner and row[3] > now:
+                return BUSY, None
+
+            # Livre ou com a lease vencida (worker que caiu): assume o envio.
+            connection.execute(
+                "UPDATE proposals SET owner = ?, lease_expires_at = ? WHERE key = ?",
+                (self.owner, now + self.lease_ttl, key),
+            )
+            stages = connection.execute(
+                "SELECT stage, result FROM proposal_stages WHERE key = ?", (key,)
+            ).fetchall()
+            return CLAIMED, {stage: json.loads(result) for stage, result in stages}
+
+    def _release(self, key: str):
+        self._connect().execute(
+            "UPDATE proposals SET owner = NULL, lease_expires_at = 0 WHERE key = ? AND owner = ?",
+            (key, self.owner),
+        )
+
+    async def record_stage(self, key: str, stage: str, result: Any):
+        await self._run(self._record_stage, key, stage, json.dumps(result, default=str))
+
+    def _record_stage(self, key: str, stage: str, result: str):
+        now = time.time()
+        with _transaction(self._connect()) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO proposal_stages (key, stage, result, finished_at) VALUES (?, ?, ?, ?)",
+                (key, stage, result, now),
+            )
+            # Cada etapa concluída renova a lease de quem está enviando.
+            connection.execute(
+                "UPDATE proposals SET updated_at = ?, lease_expires_at = ? WHERE key = ? AND owner = ?",
+                (now, now + self.lease_ttl, key, self.owner),
+            )
+
+    async def finish(self, key: str, result: Dict[str, Any]):
+        await self._run(self._finish, key, json.dumps(result, default=str))
+
+    def _finish(self, key: str, result: str):
+        self._connect().execute(
+            "UPDATE proposals SET result = ?, updated_at = ?, owner = NULL, lease_expires_at = 0 WHERE key = ?",
+            (result, time.time(), key),
+        )
+
+    async def purge(self):
+        await self._run(self._purge)
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl
+        with _transaction(self._connect()) as connection:
+            connection.execute(
+                "DELETE FROM proposal_stages WHERE key IN (SELECT key FROM proposals WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            connection.execute("DELETE FROM proposals WHERE updated_at < ?", (cutoff,))
+
+    async def close(self):
+        await self._run(self._close)
+
+    def _close(self):
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+        self.pid = None
+
+
+proposal_journal = ProposalJournal(
+    os.getenv("PROPOSAL_JOURNAL_PATH", "proposal_journal.sqlite"),
+    ttl=float(os.getenv("PROPOSAL_JOURNAL_TTL", "604800")),
+    lease_ttl=float(os.getenv("PROPOSAL_JOURNAL_LEASE_TTL", "60")),
+    poll_interval=float(os.getenv("PROPOSAL_JOURNAL_POLL_INTERVAL", "0.2")),
+)
@@ -0,0 +1,176 @@
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+from app.config import env_bool
+from app.services.http_client import PRATA_HEADERS, http_pool
+from app.services.metrics import register_client, register_proxy_pool
+from app.utils import get_logger
+import asyncio
+import httpx
+import os
+import random
+import time
+
+logger = get_logger(__name__)
+
+LATENCY_ALPHA = 0.3
+
+
+def _parse_urls(value: str) -> List[str]:
+    # PROXY_URLS="http://p1:3128, http://user:senha@p2:3128"
+    return [url.strip() for url in value.replace("\n", ",").split(",") if url.strip()]
+
+
+def proxy_name(url: str) -> str:
+    # Credenciais do proxy nunca aparecem em estatísticas ou logs.
+    parts = urlsplit(url)
+    return f"{parts.hostname}:{parts.port}" if parts.port else str(parts.hostname)
+
+
+class Proxy:
+    def __init__(self, url: str):
+        self.url = url
+        self.name = proxy_name(url)
+        self.client: Optional[httpx.AsyncClient] = None
+        self.healthy = True
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_check: Optional[float] = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        # Cada proxy tem o próprio pool de conexões.
+        if self.client is None or self.client.is_closed:
+            self.client = http_pool.build_client(proxy=self.url, headers=PRATA_HEADERS)
+        return self.client
+
+    def observe(self, latency: float):
+        self.latency = latency if self.latency is None else (
+            LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * self.latency
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 1),
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_check": self.last_check,
+        }
+
+
+class ProxyPool:
+    def __init__(self):
+        self.proxies = [Proxy(url) for url in _parse_urls(os.getenv("PROXY_URLS", ""))]
+        self.sticky = env_bool("PROXY_STICKY")
+        self.max_failures = int(os.getenv("PROXY_MAX_FAILURES", "3"))
+        self.health_url = os.getenv("PROXY_HEALTH_URL", "https://api.bancoprata.com.br/")
+        self.health_interval = float(os.getenv("PROXY_HEALTH_INTERVAL", "15"))
+        self.health_timeout = float(os.getenv("PROXY_HEALTH_TIMEOUT", "5"))
+        self.assignments: Dict[str, Proxy] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.proxies)
+
+    def _weight(self, proxy: Proxy, default: float) -> float:
+        # Proxy ainda sem medição entra com a melhor latência conhecida, para
+        # ser experimentado logo.
+        return 1 / max(proxy.latency if proxy.latency is not None else default, 0.001)
+
+    def choose(self, account: Optional[str] = None) -> Proxy:
+        # Sem nenhum proxy saudável, segue tentando com todos.
+        candidates = [proxy for proxy in self.proxies if proxy.healthy] or self.proxies
+        if self.sticky and account is not None:
+            assigned = self.assignments.get(account)
+            if assigned is not None and assigned in candidates:
+                return assigned
+
+        measured = [proxy.latency for proxy in candidates if proxy.latency is not None]
+        default = min(measured) if measured else 1.0
+        proxy = random.choices(
+            candidates, weights=[self._weight(proxy, default) for proxy in candidates]
+        )[0]
+        if self.sticky and account is not None:
+            self.assignments[account] = proxy
+        return proxy
+
+    def record(self, proxy: Proxy, latency: float, error: Optional[Exception] = None):
+        proxy.requests += 1
+        if error is None:
+            proxy.observe(latency)
+            proxy.consecutive_failures = 0
+            return
+        proxy.errors += 1
+        proxy.consecutive_failures += 1
+        proxy.last_error = f"{type(error).__name__}: {error}"
+        if proxy.healthy and proxy.consecutive_failures >= self.max_failures:
+            proxy.healthy = False
+            logger.warning(
+                "Proxy removido do pool", extra={"proxy": proxy.name, "error": proxy.last_error}
+            )
+
+    async def check(self, proxy: Proxy):
+        # Qualquer resposta do banco vale: o que se testa é o caminho pelo proxy.
+        started = time.perf_counter()
+        try:
+            await proxy.get_client().get(self.health_url, timeout=self.health_timeout)
+        except httpx.RequestError as error:
+            proxy.last_error = f"{type(error).__name__}: {error}"
+            if proxy.healthy:
+                logger.warning(
+                    "Proxy removido do pool", extra={"proxy": proxy.name, "error": proxy.last_error}
+                )
+            proxy.healthy = False
+        else:
+            proxy.observe(time.perf_counter() - started)
+            proxy.consecutive_failures = 0
+            if not proxy.healthy:
+                logger.info("Proxy de volta ao pool", extra={"proxy": proxy.name})
+            proxy.healthy = True
+        finally:
+            proxy.last_check = time.time()
+
+    async def check_all(self):
+        await asyncio.gather(*(self.check(proxy) for proxy in self.proxies))
+
+    async def start(self):
+        if self.enabled and self.health_interval > 0 and self.task is None:
+            self.task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            await self.check_all()
+            await asyncio.sleep(self.health_interval)
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        for proxy in self.proxies:
+            if proxy.client is not None and not proxy.client.is_closed:
+                await proxy.client.aclose()
+            proxy.client = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        sticky = {}
+        for proxy in self.assignments.values():
+            sticky[proxy.name] = sticky.get(proxy.name, 0) + 1
+        return {
+            "sticky": self.sticky,
+            "proxies": {
+                proxy.name: {**proxy.snapshot(), "accounts": sticky.get(proxy.name, 0)}
+                for proxy in self.proxies
+            },
+        }
+
+
+proxy_pool = ProxyPool()
+register_proxy_pool(proxy_pool)
+for _proxy in proxy_pool.proxies:
+    register_client(f"prata:{_proxy.name}", lambda proxy=_proxy: proxy.client)
@@ -0,0 +1,245 @@
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+from app.config import endpoint_setting
+from app.exceptions import BotProposalInfoException
+from app.services.retry_policy import remaining_budget
+import asyncio
+import os
+import time
+
+
+def _touch(entries: "OrderedDict[Any, Any]", key: Hashable, create: Callable[[], Any], max_size: int) -> Any:
+    # LRU limitado: contas novas (inclusive com senha errada) não fazem o
+    # estado crescer sem limite.
+    value = entries.get(key)
+    if value is None:
+        value = entries[key] = create()
+        while len(entries) > max_size:
+            entries.popitem(last=False)
+    else:
+        entries.move_to_end(key)
+    return value
+
+
+class RateLimitError(BotProposalInfoException):
+    def __init__(self, tenant: str, endpoint: str, wait: float):
+        self.tenant = tenant
+        self.endpoint = endpoint
+        self.wait = wait
+        super().__init__(
+            f"Limite de requisições ao banco atingido ({endpoint}), tente novamente em {int(wait) + 1}s"
+        )
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until_available(self) -> float:
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def reserve(self) -> float:
+        # Consome já o token (o saldo pode ficar negativo) e devolve quanto
+        # tempo o chamador precisa esperar por ele: a fila sai em ordem.
+        self._refill()
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class TenantStats:
+    def __init__(self):
+        self.queued = 0
+        self.max_queued = 0
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.rejected = 0
+
+    def enter(self):
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+
+    def leave(self):
+        self.queued -= 1
+
+    def reject(self):
+        self.queued -= 1
+        self.rejected += 1
+
+    def acquire(self, waited: float):
+        self.queued -= 1
+        self.acquired += 1
+        if waited > 0:
+            self.waited += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "wait_seconds": round(self.wait_seconds, 4),
+            "avg_wait_seconds": round(self.wait_seconds / self.waited, 4) if self.waited else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 4),
+            "rejected": self.rejected,
+        }
+
+
+class FairQueue:
+    # Limite global de um endpoint, dividido entre as contas em rodízio: cada
+    # conta com requisições na fila recebe a próxima vaga na sua vez, por
+    # maior que seja a fila das outras.
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.dispatcher: Optional[asyncio.Task] = None
+
+    def try_acquire(self) -> bool:
+        if self.waiters or self.bucket.time_until_available() > 0:
+            return False
+        self.bucket.take()
+        return True
+
+    def enqueue(self, tenant: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(tenant, deque()).append(future)
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.ensure_future(self._dispatch())
+        return future
+
+    async def _dispatch(self):
+        while self.waiters:
+            tenant, futures = next(iter(self.waiters.items()))
+            if futures[0].done():
+                # Quem desistiu (prazo ou cancelamento) só sai da fila.
+                futures.popleft()
+                if not futures:
+                    del self.waiters[tenant]
+                continue
+            wait = self.bucket.time_until_available()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            futures.popleft().set_result(None)
+            self.bucket.take()
+            if futures:
+                self.waiters.move_to_end(tenant)
+            else:
+                del self.waiters[tenant]
+
+
+class RateLimiter:
+    def __init__(self):
+        self.max_wait = float(os.getenv("RATE_LIMIT_MAX_WAIT", "10"))
+        self.max_tenants = int(os.getenv("RATE_LIMIT_TENANT_CACHE_SIZE", "10000"))
+        self.tenant_limits: Dict[str, Tuple[float, float]] = {}
+        self.account_buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.endpoint_queues: Dict[str, Optional[FairQueue]] = {}
+        self.tenants: "OrderedDict[str, TenantStats]" = OrderedDict()
+
+    def _tenant_limit(self, endpoint: str) -> Tuple[float, float]:
+        if endpoint not in self.tenant_limits:
+            rate = endpoint_setting("RATE_LIMIT_TENANT", endpoint, "RPS", "0")
+            burst = endpoint_setting("RATE_LIMIT_TENANT", endpoint, "BURST", str(max(rate, 1)))
+            self.tenant_limits[endpoint] = (rate, burst)
+        return self.tenant_limits[endpoint]
+
+    def _account_bucket(self, tenant: str, endpoint: str) -> Optional[TokenBucket]:
+        rate, burst = self._tenant_limit(endpoint)
+        if rate <= 0:
+            return None
+        return _touch(
+            self.account_buckets, (tenant, endpoint), lambda: TokenBucket(rate, burst), self.max_tenants
+        )
+
+    def _endpoint_queue(self, endpoint: str) -> Optional[FairQueue]:
+        if endpoint not in self.endpoint_queues:
+            rate = endpoint_setting("RATE_LIMIT", endpoint, "RPS", "0")
+            burst = endpoint_setting("RATE_LIMIT", endpoint, "BURST", str(max(rate, 1)))
+            self.endpoint_queues[endpoint] = FairQueue(TokenBucket(rate, burst)) if rate > 0 else None
+        return self.endpoint_queues[endpoint]
+
+    def _max_wait(self) -> float:
+        remaining = remaining_budget()
+        return self.max_wait if remaining is None else max(0.0, min(self.max_wait, remaining))
+
+    async def acquire(self, tenant: str, endpoint: str):
+        bucket = self._account_bucket(tenant, endpoint)
+        queue = self._endpoint_queue(endpoint)
+        if bucket is None and queue is None:
+            return
+
+        stats = _touch(self.tenants, tenant, TenantStats, self.max_tenants)
+        stats.enter()
+        started = time.monotonic()
+        try:
+            if bucket is not None:
+                delay = bucket.reserve()
+                if delay > self._max_wait():
+                    bucket.refund()
+                    raise RateLimitError(tenant, endpoint, delay)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            if queue is not None and not queue.try_acquire():
+                future = queue.enqueue(tenant)
+                timeout = self._max_wait()
+                try:
+                    await asyncio.wait_for(future, timeout)
+                except asyncio.TimeoutError:
+                    # O token da conta não foi usado: volta para o bucket.
+                    if bucket is not None:
+                        bucket.refund()
+                    raise RateLimitError(tenant, endpoint, timeout)
+        except RateLimitError:
+            stats.reject()
+            raise
+        except BaseException:
+            stats.leave()
+            raise
+        stats.acquire(time.monotonic() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "tenants": {tenant: stats.snapshot() for tenant, stats in self.tenants.items()},
+            "endpoints": {
+                endpoint: {
+                    "queued": sum(len(futures) for futures in queue.waiters.values()),
+                    "tenants_waiting": len(queue.waiters),
+                    "rate": queue.bucket.rate,
+                    "burst": queue.bucket.burst,
+                }
+                for endpoint, queue in self.endpoint_queues.items()
+                if queue is not None
+            },
+        }
+
+
+def is_rate_limited(error: Optional[BaseException]) -> bool:
+    while error is not None:
+        if isinstance(error, RateLimitError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+rate_limiter = RateLimiter()
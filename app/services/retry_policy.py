@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Iterator, Optional
+from app.config import endpoint_setting
+import httpx
+import asyncio
+import random
+import time
+
+RETRYABLE_STATUS = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class RetryPolicy:
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.attempts = int(endpoint_setting("RETRY", endpoint, "ATTEMPTS", "3"))
+        self.base_delay = endpoint_setting("RETRY", endpoint, "BASE_DELAY", "0.2")
+        self.max_delay = endpoint_setting("RETRY", endpoint, "MAX_DELAY", "2")
+
+    @staticmethod
+    def is_retryable(method: str, error: Exception) -> bool:
+        # Só repete o que é seguro: falhas de conexão (a requisição não chegou
+        # ao servidor) sempre; timeouts e 429/5xx transitórios só em métodos idempotentes.
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+            return True
+        if method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRYABLE_STATUS
+        return isinstance(error, (httpx.TimeoutException, httpx.RemoteProtocolError, httpx.ReadError))
+
+    def next_delay(self, method: str, error: Exception, attempt: int) -> Optional[float]:
+        if attempt >= self.attempts or not self.is_retryable(method, error):
+            return None
+        # Backoff exponencial com "full jitter".
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class RetryStats:
+    def __init__(self):
+        self.endpoints: Dict[str, Dict[str, float]] = {}
+        self.deadlines = {"count": 0, "exhausted": 0, "used_seconds": 0.0, "max_used_ratio": 0.0}
+
+    def _endpoint(self, endpoint: str) -> Dict[str, float]:
+        return self.endpoints.setdefault(
+            endpoint, {"retries": 0, "gave_up": 0, "deadline_exhausted": 0, "sleep_seconds": 0.0}
+        )
+
+    def record_retry(self, endpoint: str, delay: float):
+        stats = self._endpoint(endpoint)
+        stats["retries"] += 1
+        stats["sleep_seconds"] += delay
+
+    def record_give_up(self, endpoint: str, deadline_exhausted: bool):
+        stats = self._endpoint(endpoint)
+        stats["gave_up"] += 1
+        stats["deadline_exhausted"] += int(deadline_exhausted)
+
+    def record_deadline(self, budget: float, used: float):
+        self.deadlines["count"] += 1
+        self.deadlines["exhausted"] += int(used >= budget)
+        self.deadlines["used_seconds"] += used
+        self.deadlines["max_used_ratio"] = max(self.deadlines["max_used_ratio"], used / budget)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"endpoints": self.endpoints, "deadlines": self.deadlines}
+
+
+class RetryPolicies:
+    def __init__(self):
+        self.policies: Dict[str, RetryPolicy] = {}
+
+    def get(self, endpoint: str) -> RetryPolicy:
+        policy = self.policies.get(endpoint)
+        if policy is None:
+            policy = RetryPolicy(endpoint)
+            self.policies[endpoint] = policy
+        return policy
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    if not seconds:
+        yield
+        return
+    started = time.monotonic()
+    expires_at = started + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires_at if current is None else min(current, expires_at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+        retry_stats.record_deadline(seconds, time.monotonic() - started)
+
+
+def remaining_budget() -> Optional[float]:
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+async def _without_deadline(awaitable: Awaitable[Any]) -> Any:
+    _deadline.set(None)
+    return await awaitable
+
+
+def run_detached(awaitable: Awaitable[Any]) -> asyncio.Task:
+    # Tarefas compartilhadas entre requisições não herdam o prazo de quem as criou.
+    return asyncio.ensure_future(_without_deadline(awaitable))
+
+
+retry_policies = RetryPolicies()
+retry_stats = RetryStats()
@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.exceptions import BotUnauthorizedException
+from app.services.retry_policy import remaining_budget, run_detached
+from app.services.shared_cache import make_cache, shared_cache_store
+from app.utils import get_logger
+import httpx
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+logger = get_logger(__name__)
+
+
+def _token_expiry(token: str, default_ttl: float) -> float:
+    # Tokens JWT trazem o "exp"; para qualquer outro formato usamos o TTL padrão.
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return time.monotonic() + (float(claims["exp"]) - time.time())
+    except (IndexError, KeyError, TypeError, ValueError):
+        return time.monotonic() + default_ttl
+
+
+class AccountSession:
+    def __init__(self, username: str, key: Tuple[str, str]):
+        self.username = username
+        self.key = key
+        self.token = None
+        self.expires_at = 0.0
+        self.cookies = httpx.Cookies()
+        self.refresh_task = None
+
+    def is_valid(self) -> bool:
+        return bool(self.token) and time.monotonic() < self.expires_at
+
+    def needs_refresh(self, margin: float) -> bool:
+        return time.monotonic() >= self.expires_at - margin
+
+    def invalidate(self):
+        self.token = None
+        self.expires_at = 0.0
+
+
+class SessionRegistry:
+    def __init__(self):
+        self.token_ttl = float(os.getenv("PRATA_TOKEN_TTL", "1800"))
+        self.refresh_margin = float(os.getenv("PRATA_TOKEN_REFRESH_MARGIN", "60"))
+        self.max_sessions = int(os.getenv("PRATA_SESSION_CACHE_SIZE", "10000"))
+        # LRU limitado: credenciais novas (inclusive senhas erradas) não fazem
+        # o registro crescer sem limite.
+        self.sessions: "OrderedDict[Tuple[str, str], AccountSession]" = OrderedDict()
+        # Com o cache compartilhado, um login feito por um worker serve a todos.
+        self.shared_tokens = (
+            make_cache("tokens", ttl=self.token_ttl) if shared_cache_store.enabled else None
+        )
+        # A chave da sessão vai para o cache compartilhado em disco: a senha
+        # entra só como HMAC com um segredo da instalação, nunca como hash puro.
+        secret = os.getenv("SESSION_KEY_SECRET")
+        if not secret and self.shared_tokens is not None:
+            logger.warning(
+                "SESSION_KEY_SECRET não definido: o login de uma conta não é compartilhado entre workers"
+            )
+        self.secret = secret.encode("utf-8") if secret else os.urandom(32)
+
+    def _key(self, bank_access: Dict[str, str]) -> Tuple[str, str]:
+        password = hmac.new(
+            self.secret, bank_access["password"].encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+        return bank_access["username"], password
+
+    def get_session(self, bank_access: Dict[str, str]) -> AccountSession:
+        key = self._key(bank_access)
+        session = self.sessions.get(key)
+        if session is None:
+            session = AccountSession(bank_access["username"], key)
+            self.sessions[key] = session
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(key)
+        return session
+
+    def _drop(self, session: AccountSession):
+        if self.sessions.get(session.key) is session:
+            del self.sessions[session.key]
+
+    async def get_token(
+        self,
+        session: AccountSession,
+        login: Callable[[], Awaitable[str]],
+        rejected_token: Optional[str] = None,
+    ) -> str:
+        if rejected_token is not None and session.token == rejected_token:
+            session.invalidate()
+            await self._forget_shared(session, rejected_token)
+
+        if session.is_valid():
+            if session.needs_refresh(self.refresh_margin):
+                self._start_refresh(session, login)
+            return session.token
+
+        refresh = asyncio.shield(self._start_refresh(session, login))
+        remaining = remaining_budget()
+        if remaining is None:
+            return await refresh
+        try:
+            return await asyncio.wait_for(refresh, max(0.0, remaining))
+        except asyncio.TimeoutError:
+            raise BotUnauthorizedException(
+                "Tempo limite esgotado aguardando a autenticação"
+            )
+
+    def _start_refresh(
+        self, session: AccountSession, login: Callable[[], Awaitable[str]]
+    ) -> asyncio.Task:
+        if session.refresh_task is None or session.refresh_task.done():
+            session.refresh_task = run_detached(self._refresh(session, login))
+            session.refresh_task.add_done_callback(
+                lambda task: self._refresh_done(session, task)
+            )
+        return session.refresh_task
+
+    async def _refresh(
+        self, session: AccountSession, login: Callable[[], Awaitable[str]]
+    ) -> str:
+        if self.shared_tokens is None:
+            token = await login()
+            session.token = token
+            session.expires_at = _token_expiry(token, self.token_ttl)
+            return token
+
+        # A entrada compartilhada vence junto com a margem de renovação: quem
+        # precisar renovar encontra o cache vazio e um único worker faz o login.
+        entry = await self.shared_tokens.get_or_compute(
+            session.key,
+            lambda: self._shared_login(login),
+            ttl=lambda entry: max(0.0, entry["expires_at"] - time.time() - self.refresh_margin),
+        )
+        session.token = entry["token"]
+        session.expires_at = time.monotonic() + (entry["expires_at"] - time.time())
+        return session.token
+
+    async def _shared_login(self, login: Callable[[], Awaitable[str]]) -> Dict[str, Any]:
+        token = await login()
+        expires_in = _token_expiry(token, self.token_ttl) - time.monotonic()
+        return {"token": token, "expires_at": time.time() + expires_in}
+
+    def _refresh_done(self, session: AccountSession, task: asyncio.Task):
+        # Falhas de um refresh em segundo plano são reportadas ao próximo
+        # chamador; uma sessão que nunca autenticou sai do registro.
+        if task.cancelled() or task.exception() is None:
+            return
+        if not session.is_valid():
+            self._drop(session)
+
+    async def _forget_shared(self, session: AccountSession, rejected_token: str):
+        if self.shared_tokens is None:
+            return
+        entry = await self.shared_tokens.aget(session.key)
+        if entry is not None and entry["token"] == rejected_token:
+            await self.shared_tokens.apop(session.key)
+
+
+session_registry = SessionRegistry()
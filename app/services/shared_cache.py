@@ -0,0 +1,269 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+from app.services.retry_policy import run_detached
+from app.services.ttl_cache import TTL, Compute, TTLCache, resolve_ttl
+from app.utils import get_logger
+from app.utils.json_codec import json_dumps, json_loads
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+
+logger = get_logger(__name__)
+
+_MISSING = object()
+
+
+class SharedCacheStore:
+    def __init__(
+        self, db_path: Optional[str], lease_ttl: float, poll_interval: float, busy_timeout: float
+    ):
+        self.db_path = db_path
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.busy_timeout = busy_timeout
+        self.owner = uuid.uuid4().hex
+        self.connection: Optional[sqlite3.Connection] = None
+        self.pid: Optional[int] = None
+        # Todo acesso ao SQLite passa por uma única thread: o event loop não
+        # espera pelo disco nem pelo lock de escrita de outro worker.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.db_path)
+
+    def connect(self) -> sqlite3.Connection:
+        # Cada worker abre a própria conexão (inclusive após um fork).
+        if self.connection is None or self.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.db_path,
+                timeout=self.busy_timeout,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                "expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (namespace, expires_at)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_leases ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, owner TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            try:
+                # O cache guarda tokens: só o usuário do serviço lê o arquivo.
+                os.chmod(self.db_path, 0o600)
+            except OSError:
+                pass
+            self.connection = connection
+            self.pid = os.getpid()
+        return self.connection
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def close(self):
+        await self.run(self._close)
+
+    def _close(self):
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+        self.pid = None
+
+
+class SharedCache:
+    def __init__(self, store: SharedCacheStore, namespace: str, ttl: float, max_size: int = 10000):
+        self.store = store
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.size = 0
+        self.in_flight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json_dumps(list(key) if isinstance(key, tuple) else key).decode("utf-8")
+
+    def _read(self, key: str) -> Any:
+        try:
+            row = self.store.connect().execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, time.time()),
+            ).fetchone()
+        except sqlite3.Error as error:
+            # Com o arquivo ocupado por outro worker a leitura vira um miss.
+            logger.warning("Falha ao ler o cache compartilhado", extra={"cache": self.namespace, "error": str(error)})
+            return _MISSING
+        return _MISSING if row is None else json_loads(row[0])
+
+    async def aget(self, key: Hashable, default: Any = None) -> Any:
+        value = await self.store.run(self._read, self._key(key))
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    async def aset(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        await self.store.run(self._write, self._key(key), json_dumps(value), expires_at)
+
+    def _write(self, key: str, value: bytes, expires_at: float):
+        try:
+            connection = self.store.connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, value, expires_at),
+            )
+            self.writes += 1
+            if self.writes % 64 == 0:
+                self._evict(connection)
+        except sqlite3.Error as error:
+            logger.warning("Falha ao gravar no cache compartilhado", extra={"cache": self.namespace, "error": str(error)})
+
+    def _evict(self, connection: sqlite3.Connection):
+        # Remove os expirados e, acima do limite, os que expiram primeiro.
+        connection.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, time.time()),
+        )
+        size = self._size(connection)
+        if size > self.max_size:
+            connection.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY expires_at LIMIT ?)",
+                (self.namespace, self.namespace, size - self.max_size),
+            )
+            size = self.max_size
+        self.size = size
+
+    def _size(self, connection: sqlite3.Connection) -> int:
+        return connection.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+
+    async def apop(self, key: Hashable, default: Any = None) -> Any:
+        value = await self.store.run(self._pop, self._key(key))
+        return default if value is _MISSING else value
+
+    def _pop(self, key: str) -> Any:
+        value = self._read(key)
+        try:
+            self.store.connect().execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+            )
+        except sqlite3.Error as error:
+            logger.warning("Falha ao remover do cache compartilhado", extra={"cache": self.namespace, "error": str(error)})
+        return value
+
+    async def aclear(self):
+        await self.store.run(self._clear)
+
+    def _clear(self):
+        self.store.connect().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+        self.size = 0
+
+    async def get_or_compute(self, key: Hashable, compute: Compute, ttl: TTL = None) -> Any:
+        value = await self.aget(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        encoded = self._key(key)
+        future = self.in_flight.get(encoded)
+        if future is None:
+            future = run_detached(self._compute(encoded, key, compute, ttl))
+            self.in_flight[encoded] = future
+            future.add_done_callback(lambda done: self._forget(encoded, done))
+        return await asyncio.shield(future)
+
+    async def _compute(self, encoded: str, key: Hashable, compute: Compute, ttl: TTL) -> Any:
+        # Entre workers, só quem obtém a lease calcula; os demais aguardam o
+        # valor aparecer no cache. Uma lease vencida (worker que caiu) é assumida.
+        while True:
+            if await self.store.run(self._acquire_lease, encoded):
+                try:
+                    value = await compute()
+                    await self.aset(key, value, resolve_ttl(ttl, value))
+                    return value
+                finally:
+                    await asyncio.shield(self.store.run(self._release_lease, encoded))
+            await asyncio.sleep(self.store.poll_interval)
+            value = await self.store.run(self._read, encoded)
+            if value is not _MISSING:
+                return value
+
+    def _acquire_lease(self, key: str) -> bool:
+        now = time.time()
+        try:
+            cursor = self.store.connect().execute(
+                "INSERT INTO cache_leases (namespace, key, owner, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE cache_leases.expires_at <= ?",
+                (self.namespace, key, self.store.owner, now + self.store.lease_ttl, now),
+            )
+        except sqlite3.Error as error:
+            # Sem como coordenar, o worker calcula por conta própria.
+            logger.warning("Falha ao obter lease do cache compartilhado", extra={"cache": self.namespace, "error": str(error)})
+            return True
+        return cursor.rowcount == 1
+
+    def _release_lease(self, key: str):
+        try:
+            self.store.connect().execute(
+                "DELETE FROM cache_leases WHERE namespace = ? AND key = ? AND owner = ?",
+                (self.namespace, key, self.store.owner),
+            )
+        except sqlite3.Error:
+            pass
+
+    def _forget(self, key: str, future: asyncio.Future):
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
+        if not future.cancelled():
+            future.exception()
+
+    def _count(self):
+        try:
+            self.size = self._size(self.store.connect())
+        except sqlite3.Error:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        # Chamado de dentro do event loop: devolve o último tamanho medido e
+        # agenda uma nova contagem na thread do cache, sem esperar por ela.
+        self.store.executor.submit(self._count)
+        lookups = self.hits + self.misses
+        return {
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "shared": True,
+        }
+
+
+shared_cache_store = SharedCacheStore(
+    os.getenv("SHARED_CACHE_PATH"),
+    lease_ttl=float(os.getenv("SHARED_CACHE_LEASE_TTL", "30")),
+    poll_interval=float(os.getenv("SHARED_CACHE_POLL_INTERVAL", "0.05")),
+    busy_timeout=float(os.getenv("SHARED_CACHE_BUSY_TIMEOUT", "5")),
+)
+
+
+def make_cache(namespace: str, ttl: float, max_size: int = 10000):
+    # Com SHARED_CACHE_PATH os workers compartilham o cache; sem ele, cada um
+    # mantém o seu em memória.
+    if shared_cache_store.enabled:
+        return SharedCache(shared_cache_store, namespace, ttl, max_size)
+    return TTLCache(ttl, max_size)
@@ -0,0 +1,122 @@
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from app.exceptions import BotProposalInfoException
+import asyncio
+import time
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Awaitable[Any]],
+        requires: Iterable[str] = (),
+    ):
+        self.name = name
+        self.func = func
+        self.requires = list(requires)
+
+
+class StageExecutionError(BotProposalInfoException):
+    def __init__(self, stage: str, error: Exception):
+        self.stage = stage
+        self.error = error
+        super().__init__(f"Erro na etapa {stage}: {str(error)}")
+
+
+class StageStats:
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, stage: str, elapsed: float, failed: bool):
+        stats = self.stages.setdefault(
+            stage, {"count": 0, "failures": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        )
+        stats["count"] += 1
+        stats["failures"] += int(failed)
+        stats["total_seconds"] += elapsed
+        stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                **stats,
+                "avg_seconds": stats["total_seconds"] / stats["count"],
+            }
+            for stage, stats in self.stages.items()
+        }
+
+
+class StageExecutor:
+    def __init__(
+        self,
+        stages: List[Stage],
+        stats: Optional[StageStats] = None,
+        results: Optional[Dict[str, Any]] = None,
+        on_complete: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+    ):
+        names = {stage.name for stage in stages}
+        for stage in stages:
+            missing = [name for name in stage.requires if name not in names]
+            if missing:
+                raise ValueError(f"Etapa {stage.name} depende de etapas inexistentes: {missing}")
+        self.stages = stages
+        self.stats = stats
+        self.on_complete = on_complete
+        # Etapas já concluídas (ex.: retomadas de um journal) não são executadas de novo.
+        self.results: Dict[str, Any] = dict(results or {})
+        self.timings: Dict[str, float] = {}
+
+    async def run(self) -> Dict[str, Any]:
+        tasks: Dict[str, asyncio.Task] = {}
+        pending = list(self.stages)
+        while pending:
+            ready = [
+                stage for stage in pending if all(name in tasks for name in stage.requires)
+            ]
+            if not ready:
+                raise ValueError("Dependência circular entre as etapas da proposta")
+            for stage in ready:
+                tasks[stage.name] = asyncio.ensure_future(self._run_stage(stage, tasks))
+                pending.remove(stage)
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return self.results
+
+    async def _run_stage(self, stage: Stage, tasks: Dict[str, asyncio.Task]) -> Any:
+        if stage.requires:
+            await asyncio.gather(*(tasks[name] for name in stage.requires))
+        if stage.name in self.results:
+            return self.results[stage.name]
+
+        started = time.perf_counter()
+        try:
+            result = await stage.func(self.results)
+        except asyncio.CancelledError:
+            raise
+        except StageExecutionError:
+            self._record(stage.name, started, failed=True)
+            raise
+        except Exception as error:
+            self._record(stage.name, started, failed=True)
+            raise StageExecutionError(stage.name, error) from error
+
+        self._record(stage.name, started, failed=False)
+        self.results[stage.name] = result
+        if self.on_complete is not None:
+            await self.on_complete(stage.name, result)
+        return result
+
+    def _record(self, stage: str, started: float, failed: bool):
+        elapsed = time.perf_counter() - started
+        self.timings[stage] = elapsed
+        if self.stats is not None:
+            self.stats.record(stage, elapsed, failed)
+
+
+proposal_stage_stats = StageStats()
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Union
+from app.services.retry_policy import run_detached
+import asyncio
+import time
+
+_MISSING = object()
+
+Compute = Callable[[], Awaitable[Any]]
+TTL = Union[None, float, Callable[[Any], Optional[float]]]
+
+
+def resolve_ttl(ttl: TTL, value: Any) -> Optional[float]:
+    return ttl(value) if callable(ttl) else ttl
+
+
+class TTLCache:
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self.entries[key]
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self.entries.clear()
+
+    # Mesma interface assíncrona do SharedCache, para quem usa make_cache.
+    async def aget(self, key: Hashable, default: Any = None) -> Any:
+        return self.get(key, default)
+
+    async def aset(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self.set(key, value, ttl)
+
+    async def apop(self, key: Hashable, default: Any = None) -> Any:
+        return self.pop(key, default)
+
+    async def aclear(self):
+        self.clear()
+
+    async def get_or_compute(self, key: Hashable, compute: Compute, ttl: TTL = None) -> Any:
+        # Chamadas simultâneas para a mesma chave compartilham um único cálculo,
+        # que não herda o prazo de quem o disparou.
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        future = self.in_flight.get(key)
+        if future is None:
+            future = run_detached(self._compute(key, compute, ttl))
+            self.in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    async def _compute(self, key: Hashable, compute: Compute, ttl: TTL) -> Any:
+        value = await compute()
+        self.set(key, value, resolve_ttl(ttl, value))
+        return value
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,151 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.exceptions import BotProposalInfoException
+from app.services.retry_policy import run_detached
+import asyncio
+import os
+import time
+
+
+class WaitListPoller:
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]],
+        min_interval: float,
+        max_interval: float,
+        on_done: Optional[Callable[[], None]] = None,
+    ):
+        self.fetch = fetch
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.on_done = on_done
+        self.interval = min_interval
+        self.index: Dict[str, str] = {}
+        self.waiters: Dict[str, List[asyncio.Future]] = {}
+        self.last_refresh = 0.0
+        self.last_error: Optional[Exception] = None
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def _is_fresh(self) -> bool:
+        return time.monotonic() - self.last_refresh < self.min_interval
+
+    async def wait_for(self, document: str, timeout: float) -> str:
+        if self._is_fresh() and document in self.index:
+            return self.index[document]
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(document, []).append(future)
+        self.interval = self.min_interval
+        if self.task is None or self.task.done():
+            self.task = run_detached(self._run())
+            if self.on_done is not None:
+                self.task.add_done_callback(lambda _: self.on_done())
+        elif not self._is_fresh():
+            self.wakeup.set()
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            if self.last_error is not None:
+                raise BotProposalInfoException(str(self.last_error))
+            raise BotProposalInfoException(
+                "Status ainda não disponível, tentar novamente mais tarde"
+            )
+        finally:
+            self._unsubscribe(document, future)
+
+    def _unsubscribe(self, document: str, future: asyncio.Future):
+        futures = self.waiters.get(document, [])
+        if future in futures:
+            futures.remove(future)
+        if not futures:
+            self.waiters.pop(document, None)
+
+    def _update(self, items: List[Dict[str, Any]]) -> int:
+        self.index = {
+            item["document"]: item["status_reason"]
+            for item in items
+            if item.get("document") and item.get("status_reason")
+        }
+        self.last_refresh = time.monotonic()
+
+        resolved = 0
+        for document, futures in list(self.waiters.items()):
+            if document not in self.index:
+                continue
+            for future in futures:
+                if not future.done():
+                    future.set_result(self.index[document])
+                    resolved += 1
+        return resolved
+
+    async def _run(self):
+        while self.waiters:
+            self.wakeup.clear()
+            try:
+                resolved = self._update(await self.fetch())
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                self.last_error = error
+                resolved = 0
+
+            if resolved:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * 1.5, self.max_interval)
+
+            if not self.waiters:
+                break
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    async def close(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+
+class WaitListPollers:
+    def __init__(self):
+        self.min_interval = float(os.getenv("WAIT_LIST_MIN_INTERVAL", "2"))
+        self.max_interval = float(os.getenv("WAIT_LIST_MAX_INTERVAL", "5"))
+        self.pollers: Dict[Any, WaitListPoller] = {}
+
+    def get(
+        self, account: Any, fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> WaitListPoller:
+        # Um poller por conta (chave da sessão, não o objeto): sessões
+        # recriadas para as mesmas credenciais reaproveitam o mesmo poller.
+        poller = self.pollers.get(account)
+        if poller is None:
+            poller = WaitListPoller(
+                fetch,
+                self.min_interval,
+                self.max_interval,
+                on_done=lambda: self._discard(account, poller),
+            )
+            self.pollers[account] = poller
+        elif not poller.running:
+            poller.fetch = fetch
+        return poller
+
+    def _discard(self, account: Any, poller: WaitListPoller):
+        # O poller sai quando o loop termina sem ninguém aguardando.
+        if not poller.waiters and not poller.running and self.pollers.get(account) is poller:
+            del self.pollers[account]
+
+    async def close(self):
+        for poller in self.pollers.values():
+            await poller.close()
+        self.pollers.clear()
+
+
+wait_list_pollers = WaitListPollers()
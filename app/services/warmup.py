@@ -0,0 +1,157 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.services.http_client import http_pool
+from app.services.banks_service import load_bank_directory, render_bank_list
+from app.services.prata_api_service import PrataApiService
+from app.services.proxy_pool import proxy_pool
+from app.services.retry_policy import deadline_scope
+from app.utils import get_logger
+from app.utils.json_codec import json_loads
+import asyncio
+import httpx
+import os
+import time
+
+logger = get_logger(__name__)
+
+PENDING = "pending"
+OK = "ok"
+FAILED = "failed"
+
+PRATA_PING_URL = "https://api.bancoprata.com.br/"
+VIACEP_PING_URL = "https://viacep.com.br/ws/01001000/json/"
+
+
+def _parse_accounts(value: str) -> List[Dict[str, str]]:
+    # WARMUP_ACCOUNTS='[{"username": "...", "password": "..."}]'
+    if not value.strip():
+        return []
+    try:
+        accounts = json_loads(value)
+    except ValueError:
+        logger.error("WARMUP_ACCOUNTS inválido, esperado uma lista JSON de contas")
+        return []
+    return [
+        {"username": account["username"], "password": account["password"]}
+        for account in accounts
+        if isinstance(account, dict) and account.get("username") and account.get("password")
+    ]
+
+
+class Warmup:
+    def __init__(self):
+        self.accounts = _parse_accounts(os.getenv("WARMUP_ACCOUNTS", ""))
+        self.timeout = float(os.getenv("WARMUP_TIMEOUT", "20"))
+        self.connections = int(os.getenv("WARMUP_CONNECTIONS", "2"))
+        self.keepalive_interval = float(os.getenv("WARMUP_KEEPALIVE_INTERVAL", "20"))
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.finished = False
+        self.task: Optional[asyncio.Task] = None
+        self.keepalive_task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        # Contas e conexões são só aquecimento: uma falha fica registrada, mas
+        # não tira o worker do ar. Sem o diretório de bancos ele não fica pronto.
+        return self.finished and self.steps.get("banks", {}).get("status") == OK
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "finished": self.finished, "steps": self.steps}
+
+    def load_reference_data(self):
+        started = time.perf_counter()
+        load_bank_directory()
+        render_bank_list()
+        self._record("banks", OK, started)
+
+    async def start(self):
+        if self.task is not None:
+            return
+        self.load_reference_data()
+        self.task = asyncio.create_task(self._run())
+
+    async def close(self):
+        for task in (self.task, self.keepalive_task):
+            if task is not None and not task.done():
+                task.cancel()
+        await asyncio.gather(
+            *(task for task in (self.task, self.keepalive_task) if task is not None),
+            return_exceptions=True,
+        )
+        self.task = None
+        self.keepalive_task = None
+        self.finished = False
+
+    async def _run(self):
+        steps = {
+            f"connect_{name}": lambda client=client: self._connect(client, PRATA_PING_URL)
+            for name, client in self._prata_clients()
+        }
+        steps["connect_viacep"] = lambda: self._connect(http_pool.get_viacep_client(), VIACEP_PING_URL)
+        for account in self.accounts:
+            steps[f"login:{account['username']}"] = lambda account=account: self._authenticate(account)
+        for name in steps:
+            self.steps[name] = {"status": PENDING}
+
+        await asyncio.gather(*(self._step(name, func) for name, func in steps.items()))
+        self.finished = True
+        logger.info("Aquecimento concluído", extra={"steps": self.steps})
+
+        if self.keepalive_interval > 0:
+            self.keepalive_task = asyncio.create_task(self._keep_warm())
+
+    async def _step(self, name: str, func: Callable[[], Awaitable[Any]]):
+        started = time.perf_counter()
+        try:
+            with deadline_scope(self.timeout):
+                await asyncio.wait_for(func(), self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            self._record(name, FAILED, started, error)
+            logger.warning(
+                "Falha no aquecimento", extra={"step": name, "error": f"{type(error).__name__}: {error}"}
+            )
+            return
+        self._record(name, OK, started)
+
+    def _record(self, name: str, status: str, started: float, error: Optional[Exception] = None):
+        self.steps[name] = {
+            "status": status,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        if error is not None:
+            self.steps[name]["error"] = str(error) or type(error).__name__
+
+    async def _connect(self, client: httpx.AsyncClient, url: str):
+        # Requisições simultâneas abrem conexões distintas (TLS e proxy
+        # incluídos), que ficam no pool para os primeiros clientes. Qualquer
+        # status serve: o que importa é a conexão.
+        await asyncio.gather(*(client.get(url) for _ in range(max(1, self.connections))))
+
+    def _prata_clients(self) -> List[Tuple[str, httpx.AsyncClient]]:
+        # Com o pool de proxies, cada proxy tem as próprias conexões a aquecer.
+        if proxy_pool.enabled:
+            return [(f"prata:{proxy.name}", proxy.get_client()) for proxy in proxy_pool.proxies]
+        return [("prata", http_pool.get_prata_client())]
+
+    async def _authenticate(self, account: Dict[str, str]):
+        service = PrataApiService()
+        await service.authenticate({"bank_access": account})
+
+    async def _keep_warm(self):
+        # Renova as conexões antes do HTTP_KEEPALIVE_EXPIRY e os tokens das
+        # contas antes de expirarem.
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            results = await asyncio.gather(
+                *(self._connect(client, PRATA_PING_URL) for _, client in self._prata_clients()),
+                self._connect(http_pool.get_viacep_client(), VIACEP_PING_URL),
+                *(self._authenticate(account) for account in self.accounts),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.debug("Falha ao manter conexões aquecidas", extra={"error": str(result)})
+
+
+warmup = Warmup()
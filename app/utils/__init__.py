@@ -5,4 +5,6 @@ from .format_response import format_result
 from .format_cpf import format_cpf
 from .format_date import format_date
 from .format_phone import format_phone
-from .format_pix_infos import get_bank_info
\ No newline at end of file
+from .format_pix_infos import get_bank_info
+from .logger import get_logger
+from .validators import normalize_contact, validate_cep, validate_contacts, validate_cpf
@@ -1,6 +1,9 @@
 from typing import Dict, Optional
+from .logger import get_logger
 import re
 
+logger = get_logger(__name__)
+
 
 def extract_max_value(
     result: Dict[str, Dict[str, str]], currency_symbol: str = "R$"
@@ -15,6 +18,5 @@ def extract_max_value(
             max_value_str = max_value_str.replace(".", "").replace(",", ".")
             return float(max_value_str)
     except (KeyError, ValueError, AttributeError) as e:
-        print(f"Erro ao extrair o valor: {e}")
-        pass
+        logger.warning("Erro ao extrair o valor", extra={"error": str(e)})
     return None
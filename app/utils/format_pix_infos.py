@@ -1,10 +1,9 @@
-def get_bank_info(data):
+def get_bank_info(account):
     return {
-        "cpf": data['data'].get('taxId', 'N/A'),
-        "name": data['data'].get('name', 'N/A'),
-        "bank_name": data['data'].get('bankName', 'N/A'),
-        "bank_id": data['data'].get('bank_id', 'N/A'),
-        "branch_code": data['data'].get('branchCode', 'N/A'),
-        "account_number": data['data'].get('accountNumber', 'N/A'),
+        "cpf": account.get('taxId', 'N/A'),
+        "name": account.get('name', 'N/A'),
+        "bank_name": account.get('bankName', 'N/A'),
+        "bank_id": account.get('bank_id', 'N/A'),
+        "branch_code": account.get('branchCode', 'N/A'),
+        "account_number": account.get('accountNumber', 'N/A'),
     }
-
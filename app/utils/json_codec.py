@@ -0,0 +1,87 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Union
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    # Mesmas conversões que o jsonable_encoder faz nos tipos que aparecem nas respostas.
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+class JsonCodec:
+    def __init__(
+        self,
+        name: str,
+        loads: Callable[[Union[bytes, str]], Any],
+        dumps: Callable[[Any], bytes],
+    ):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+# json.loads aceita bytes e detecta o encoding sozinho, sem um str intermediário.
+CODECS: Dict[str, JsonCodec] = {"stdlib": JsonCodec("stdlib", json.loads, _stdlib_dumps)}
+if orjson is not None:
+    CODECS["orjson"] = JsonCodec("orjson", orjson.loads, _orjson_dumps)
+
+
+def register_codec(codec: JsonCodec):
+    CODECS[codec.name] = codec
+
+
+def get_codec(name: str = "auto") -> JsonCodec:
+    if name == "auto":
+        return CODECS.get("orjson") or CODECS["stdlib"]
+    if name not in CODECS:
+        raise ValueError(f"Codec JSON indisponível: {name} (disponíveis: {', '.join(CODECS)})")
+    return CODECS[name]
+
+
+codec = get_codec(os.getenv("JSON_CODEC", "auto").strip().lower())
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    # Erros de qualquer codec são json.JSONDecodeError (o do orjson é subclasse).
+    return codec.loads(data)
+
+
+def json_dumps(value: Any) -> bytes:
+    return codec.dumps(value)
+
+
+# Resposta padrão da API; rotas que a devolvem diretamente também deixam de
+# passar pelo jsonable_encoder do FastAPI.
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return codec.dumps(content)
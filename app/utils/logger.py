@@ -0,0 +1,151 @@
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+import uuid
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_STANDARD_ATTRIBUTES = set(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "request_id", "suppressed"}
+
+# Campos estruturados que identificam uma falha; medições como latency_ms e
+# attempts mudam a cada chamada e ficam fora da chave do ErrorSampler.
+_SAMPLE_FIELDS = ("endpoint", "status", "error", "cache", "proxy", "step")
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = "".join(traceback.format_exception(*record.exc_info))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ErrorSampler(logging.Filter):
+    # Erros idênticos repetidos são emitidos uma vez por janela; o próximo
+    # registro emitido informa quantos foram suprimidos. Idêntico inclui os
+    # argumentos e os campos que identificam a falha (_SAMPLE_FIELDS): uma
+    # falha diferente nunca fica escondida atrás de outra.
+    def __init__(self, window: float):
+        super().__init__()
+        self.window = window
+        self.seen: Dict[Tuple, Tuple[float, int]] = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.window <= 0:
+            return True
+        error = record.exc_info[1] if record.exc_info else None
+        extra = tuple(str(getattr(record, name, None))[:200] for name in _SAMPLE_FIELDS)
+        key = (
+            record.name, record.msg, str(record.args)[:200],
+            type(error).__name__, str(error)[:200], extra,
+        )
+        now = time.monotonic()
+        with self.lock:
+            first_seen, suppressed = self.seen.get(key, (0.0, 0))
+            if now - first_seen < self.window:
+                self.seen[key] = (first_seen, suppressed + 1)
+                return False
+            self.seen[key] = (now, 0)
+            if len(self.seen) > 10000:
+                self.seen.clear()
+        record.suppressed = suppressed
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Só captura o contexto da requisição; a formatação (inclusive do
+        # traceback) fica para a thread do listener, fora do event loop.
+        record.request_id = request_id_var.get()
+        return record
+
+
+class RequestIdMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+
+def setup_logging():
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = ContextQueueHandler(log_queue)
+    handler.addFilter(ErrorSampler(float(os.getenv("LOG_SAMPLE_WINDOW", "60"))))
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    # O httpx registra cada requisição em INFO; a latência das chamadas externas
+    # já sai em DEBUG pelo track_upstream.
+    for name in ("httpx", "httpcore"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -0,0 +1,171 @@
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import re
+
+_NON_DIGITS = re.compile(r"\D")
+_ISO_DATE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+_BR_DATE = re.compile(r"^(\d{2})/(\d{2})/(\d{4})$")
+
+UFS = frozenset(
+    "AC AL AM AP BA CE DF ES GO MA MG MS MT PA PB PE PI PR RJ RN RO RR RS SC SE SP TO".split()
+)
+DDDS = frozenset(
+    {11, 12, 13, 14, 15, 16, 17, 18, 19, 21, 22, 24, 27, 28, 31, 32, 33, 34, 35, 37, 38}
+    | {41, 42, 43, 44, 45, 46, 47, 48, 49, 51, 53, 54, 55, 61, 62, 63, 64, 65, 66, 67}
+    | {68, 69, 71, 73, 74, 75, 77, 79, 81, 82, 83, 84, 85, 86, 87, 88, 89, 91, 92, 93}
+    | {94, 95, 96, 97, 98, 99}
+)
+MAX_AGE = 120
+
+
+def _digits(value: Any) -> str:
+    return _NON_DIGITS.sub("", str(value))
+
+
+def validate_cpf(value: Any) -> str:
+    cpf = _digits(value)
+    if len(cpf) != 11 or cpf == cpf[0] * 11:
+        raise ValueError("CPF inválido")
+    numbers = [int(char) for char in cpf]
+    for size in (9, 10):
+        total = sum(digit * weight for digit, weight in zip(numbers, range(size + 1, 1, -1)))
+        if (total * 10 % 11) % 10 != numbers[size]:
+            raise ValueError("CPF inválido: dígito verificador não confere")
+    return cpf
+
+
+def validate_phone(value: Any) -> str:
+    # Celular com DDD: 11 dígitos, começando por 9 (aceita o prefixo 55).
+    phone = _digits(value)
+    if len(phone) == 13 and phone.startswith("55"):
+        phone = phone[2:]
+    if len(phone) != 11 or phone[2] != "9":
+        raise ValueError("Telefone inválido: informe um celular com DDD")
+    if int(phone[:2]) not in DDDS:
+        raise ValueError(f"Telefone inválido: DDD {phone[:2]} inexistente")
+    return phone
+
+
+def parse_date(value: Any) -> date:
+    text = str(value).strip()
+    match = _ISO_DATE.match(text)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = _BR_DATE.match(text)
+        if not match:
+            raise ValueError("Data inválida: use AAAA-MM-DD")
+        day, month, year = match.groups()
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        raise ValueError(f"Data inexistente: {text}")
+
+
+def validate_date(value: Any) -> str:
+    # Datas do cadastro (nascimento, emissão do documento) ficam no passado.
+    parsed = parse_date(value)
+    today = date.today()
+    if parsed > today:
+        raise ValueError("Data inválida: no futuro")
+    if parsed.year < today.year - MAX_AGE:
+        raise ValueError("Data inválida: anterior ao limite aceito")
+    return parsed.isoformat()
+
+
+def validate_uf(value: Any) -> str:
+    uf = str(value).strip().upper()
+    if uf not in UFS:
+        raise ValueError(f"UF inválida: {value}")
+    return uf
+
+
+def validate_cep(value: Any) -> str:
+    cep = _digits(value)
+    if len(cep) != 8 or cep == "00000000":
+        raise ValueError("CEP inválido")
+    return cep
+
+
+CONTACT_VALIDATORS: Dict[str, Callable[[Any], str]] = {
+    "cpf": validate_cpf,
+    "phone": validate_phone,
+    "birthdate": validate_date,
+    "document_issue_date": validate_date,
+    "document_federation_unit": validate_uf,
+    "state": validate_uf,
+    "zip_code": validate_cep,
+}
+
+
+class ContactValidationError(ValueError):
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        super().__init__("; ".join(f"{field}: {message}" for field, message in errors.items()))
+
+
+def contact_errors(contact: Dict[str, Any]) -> Dict[str, str]:
+    errors = {}
+    if (
+        contact.get("birthdate")
+        and contact.get("document_issue_date")
+        and contact["document_issue_date"] < contact["birthdate"]
+    ):
+        errors["document_issue_date"] = "Data de emissão anterior ao nascimento"
+    return errors
+
+
+def normalize_contact(
+    contact: Dict[str, Any], required: Iterable[str] = ("cpf",)
+) -> Dict[str, Any]:
+    # Valida e normaliza os campos conhecidos; devolve o contato normalizado
+    # ou levanta ValueError com todos os erros encontrados.
+    normalized = dict(contact)
+    errors: Dict[str, str] = {}
+    for field in required:
+        if not normalized.get(field):
+            errors[field] = "Campo obrigatório"
+    for field, validator in CONTACT_VALIDATORS.items():
+        value = normalized.get(field)
+        if field in errors or value in (None, ""):
+            continue
+        try:
+            normalized[field] = validator(value)
+        except ValueError as error:
+            errors[field] = str(error)
+    if not errors:
+        errors.update(contact_errors(normalized))
+    if errors:
+        raise ContactValidationError(errors)
+    return normalized
+
+
+def validate_contacts(
+    contacts: Iterable[Dict[str, Any]], required: Iterable[str] = ("cpf",)
+) -> Dict[str, List[Dict[str, Any]]]:
+    # Lista de leads em uma passada: os válidos já normalizados e os inválidos
+    # com o erro de cada campo, ambos com o índice original. CPFs repetidos
+    # ficam só na primeira ocorrência.
+    required = tuple(required)
+    valid: List[Dict[str, Any]] = []
+    invalid: List[Dict[str, Any]] = []
+    seen: Dict[str, int] = {}
+    for index, contact in enumerate(contacts):
+        if not isinstance(contact, dict):
+            invalid.append({"index": index, "cpf": None, "errors": {"contact": "Contato inválido"}})
+            continue
+        try:
+            normalized = normalize_contact(contact, required)
+        except ContactValidationError as error:
+            invalid.append({"index": index, "cpf": contact.get("cpf"), "errors": error.errors})
+            continue
+        cpf: Optional[str] = normalized.get("cpf")
+        if cpf is not None and cpf in seen:
+            invalid.append(
+                {"index": index, "cpf": cpf, "errors": {"cpf": f"CPF repetido (índice {seen[cpf]})"}}
+            )
+            continue
+        if cpf is not None:
+            seen[cpf] = index
+        valid.append({"index": index, "contact": normalized})
+    return {"valid": valid, "invalid": invalid}
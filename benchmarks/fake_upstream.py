@@ -0,0 +1,224 @@
+from collections import Counter
+from typing import Any, Dict, Optional
+import asyncio
+import base64
+import hashlib
+import httpx
+import json
+import math
+import random
+import time
+
+PRATA_ROUTES = {
+    "/v1/users/login": "login",
+    "/v1/qitech/fgts/balance": "balance",
+    "/v1/qitech/fgts/balance-wait-list": "wait_list",
+    "/v1/payments/bank-account/info": "pix",
+    "/v1/clients/account/admin": "account",
+    "/v1/clients/qualification/admin": "qualification",
+    "/v1/clients/address/admin": "address",
+    "/v1/clients/bank-account/admin": "bank_account",
+    "/v1/proposals/admin": "proposal",
+    "/v1/anti-fraud": "anti_fraud",
+}
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "seed": 1,
+    # Latência de cada endpoint como lognormal definida pela mediana e p99.
+    "endpoints": {
+        "login": {"median_ms": 250, "p99_ms": 900, "error_rate": 0.0},
+        "balance": {"median_ms": 400, "p99_ms": 2000, "error_rate": 0.0},
+        "wait_list": {"median_ms": 300, "p99_ms": 1200, "error_rate": 0.0},
+        "pix": {"median_ms": 200, "p99_ms": 800, "error_rate": 0.0},
+        "account": {"median_ms": 150, "p99_ms": 600, "error_rate": 0.0},
+        "qualification": {"median_ms": 150, "p99_ms": 600, "error_rate": 0.0},
+        "address": {"median_ms": 150, "p99_ms": 600, "error_rate": 0.0},
+        "bank_account": {"median_ms": 150, "p99_ms": 600, "error_rate": 0.0},
+        "proposal": {"median_ms": 300, "p99_ms": 1200, "error_rate": 0.0},
+        "anti_fraud": {"median_ms": 200, "p99_ms": 800, "error_rate": 0.0},
+        "viacep": {"median_ms": 80, "p99_ms": 400, "error_rate": 0.0},
+    },
+    # Proporção de CPFs sem saldo liberado (caem na fila de saldo), sem chave
+    # PIX e de CEPs inexistentes.
+    "pending_rate": 0.1,
+    "pix_not_found_rate": 0.1,
+    "cep_not_found_rate": 0.05,
+    # Itens de outros CPFs devolvidos pela fila de saldo a cada consulta.
+    "wait_list_size": 200,
+    "token_ttl": 1800,
+}
+
+
+def load_profile(path: Optional[str] = None, **overrides) -> Dict[str, Any]:
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    if path:
+        with open(path, "r", encoding="utf-8") as file:
+            custom = json.load(file)
+        for name, settings in custom.pop("endpoints", {}).items():
+            profile["endpoints"].setdefault(name, {}).update(settings)
+        profile.update(custom)
+
+    scale = overrides.pop("latency_scale", None)
+    error_rate = overrides.pop("error_rate", None)
+    for settings in profile["endpoints"].values():
+        if scale is not None:
+            settings["median_ms"] *= scale
+            settings["p99_ms"] *= scale
+        if error_rate is not None:
+            settings["error_rate"] = error_rate
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    return profile
+
+
+class LatencyModel:
+    def __init__(self, median_ms: float, p99_ms: float, rng: random.Random):
+        self.mu = math.log(max(median_ms, 0.001) / 1000)
+        # z(0.99) ≈ 2.326: o p99 da lognormal é exp(mu + 2.326 * sigma).
+        self.sigma = max(math.log(max(p99_ms, median_ms) / max(median_ms, 0.001)) / 2.326, 0.0)
+        self.zero = median_ms <= 0
+        self.rng = rng
+
+    def sample(self) -> float:
+        if self.zero:
+            return 0.0
+        return self.rng.lognormvariate(self.mu, self.sigma)
+
+
+def _bucket(value: str, salt: str) -> float:
+    # Decisão determinística por CPF/CEP, para que repetições se comportem igual.
+    digest = hashlib.sha256(f"{salt}:{value}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+class FakeUpstream(httpx.AsyncBaseTransport):
+    def __init__(self, profile: Dict[str, Any]):
+        self.profile = profile
+        self.rng = random.Random(profile.get("seed"))
+        self.latency = {
+            name: LatencyModel(settings["median_ms"], settings["p99_ms"], self.rng)
+            for name, settings in profile["endpoints"].items()
+        }
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.proposals = 0
+        self.wait_list = self._build_wait_list(profile["wait_list_size"])
+        self.pending: Dict[str, Dict[str, str]] = {}
+
+    @staticmethod
+    def _build_wait_list(size: int):
+        return [
+            {"document": f"{index:011d}", "status_reason": "Saldo insuficiente"}
+            for index in range(size)
+        ]
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.errors.clear()
+        self.max_in_flight = self.in_flight
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = self._endpoint(request)
+        self.calls[endpoint] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            model = self.latency.get(endpoint)
+            if model is not None:
+                await asyncio.sleep(model.sample())
+            settings = self.profile["endpoints"].get(endpoint, {})
+            if self.rng.random() < settings.get("error_rate", 0.0):
+                self.errors[endpoint] += 1
+                return self._json(503, {"error": {"message": "Serviço indisponível"}}, request)
+            return self._respond(endpoint, request)
+        finally:
+            self.in_flight -= 1
+
+    def _endpoint(self, request: httpx.Request) -> str:
+        if request.url.host == "viacep.com.br":
+            return "viacep"
+        return PRATA_ROUTES.get(request.url.path, "other")
+
+    @staticmethod
+    def _json(status_code: int, content: Any, request: httpx.Request, **kwargs) -> httpx.Response:
+        return httpx.Response(status_code, json=content, request=request, **kwargs)
+
+    def _respond(self, endpoint: str, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        if endpoint == "login":
+            return self._json(
+                200,
+                {"data": {"token": self._token()}},
+                request,
+                headers={"set-cookie": "session=bench; Path=/"},
+            )
+        if endpoint == "balance":
+            document = params.get("document", "")
+            if params.get("rate_id") == "16":
+                return self._json(200, {"data": self._check_value()}, request)
+            if _bucket(document, "pending") < self.profile["pending_rate"]:
+                self.pending[document] = {"document": document, "status_reason": "Saldo em processamento"}
+                return self._json(200, {"data": {"issue_amount": None}}, request)
+            return self._json(200, {"data": {"issue_amount": 1500.0}}, request)
+        if endpoint == "wait_list":
+            return self._json(200, {"data": self.wait_list + list(self.pending.values())}, request)
+        if endpoint == "pix":
+            pix_key = params.get("pix_key", "")
+            if _bucket(pix_key, "pix") < self.profile["pix_not_found_rate"]:
+                return self._json(404, {"error": {"message": "Chave PIX não encontrada"}}, request)
+            return self._json(200, {"data": self._pix(pix_key)}, request)
+        if endpoint in ("account", "qualification", "address", "bank_account"):
+            return self._json(200, {"data": {"id": "bench-account"}}, request)
+        if endpoint == "proposal":
+            self.proposals += 1
+            return self._json(200, {"data": {"id": self.proposals, "account_id": "bench-account"}}, request)
+        if endpoint == "anti_fraud":
+            return self._json(200, {"data": {"token": f"sign-{params.get('account_id', '')}"}}, request)
+        if endpoint == "viacep":
+            cep = request.url.path.split("/")[2]
+            if _bucket(cep, "cep") < self.profile["cep_not_found_rate"]:
+                return self._json(200, {"erro": True}, request)
+            return self._json(200, self._address(cep), request)
+        return self._json(404, {"error": {"message": "Not Found"}}, request)
+
+    def _token(self) -> str:
+        def encode(content):
+            raw = json.dumps(content).encode()
+            return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+        claims = {"exp": int(time.time() + self.profile["token_ttl"])}
+        return f"{encode({'alg': 'none'})}.{encode(claims)}.bench"
+
+    @staticmethod
+    def _check_value() -> Dict[str, Any]:
+        return {
+            "disbursed_issue_amount": 1200.0,
+            "assignment_amount": 1500.0,
+            "iof_amount": 12.5,
+            "tac": 0,
+            "monthly_rate": 0.0179,
+        }
+
+    @staticmethod
+    def _pix(pix_key: str) -> Dict[str, Any]:
+        return {
+            "bankName": "Banco Benchmark",
+            "name": "Cliente Benchmark",
+            "accountNumber": "123456",
+            "branchCode": "0001",
+            "bank_id": "341",
+            "created": "2020-01-01",
+            "taxId": pix_key,
+        }
+
+    @staticmethod
+    def _address(cep: str) -> Dict[str, Any]:
+        return {
+            "cep": f"{cep[:5]}-{cep[5:]}",
+            "logradouro": "Rua Benchmark",
+            "complemento": "",
+            "bairro": "Centro",
+            "localidade": "São Paulo",
+            "uf": "SP",
+        }
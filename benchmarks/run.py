@@ -0,0 +1,433 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# As configurações do app são lidas na importação: os padrões do benchmark
+# precisam estar no ambiente antes de importar o main.
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+os.environ.setdefault("WARMUP_KEEPALIVE_INTERVAL", "0")
+os.environ.setdefault(
+    "PROPOSAL_JOURNAL_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-"), "journal.sqlite")
+)
+# Nada do ambiente pode levar o benchmark aos serviços reais. Vazias em vez
+# de removidas: o load_dotenv do app não sobrescreve variáveis existentes,
+# mas recolocaria as que faltam a partir do .env.
+for _name in ("CEP_DATABASE_PATH", "PROXY_URL", "PROXY_URLS"):
+    os.environ[_name] = ""
+
+import httpx  # noqa: E402
+
+from benchmarks.fake_upstream import FakeUpstream, load_profile  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+API = "/api/v1"
+
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+def make_cpf(number: int) -> str:
+    digits = [int(char) for char in f"{number % 10**9:09d}"]
+    for size in (9, 10):
+        total = sum(digit * weight for digit, weight in zip(digits, range(size + 1, 1, -1)))
+        digits.append((total * 10 % 11) % 10)
+    return "".join(str(digit) for digit in digits)
+
+
+def make_contact(number: int) -> Dict[str, str]:
+    return {
+        "cpf": make_cpf(number),
+        "birthdate": "1990-05-17",
+        "gender": "M",
+        "name": f"Cliente {number}",
+        "phone": "11987654321",
+        "document_issue_date": "2010-03-01",
+        "document": f"{number:09d}",
+        "document_federation_unit": "SP",
+        "document_type": "RG",
+        "mother_name": "Maria Benchmark",
+        "city": "São Paulo",
+        "suburb": "Centro",
+        "number": "100",
+        "state": "SP",
+        "street": "Rua Benchmark",
+        "zip_code": "01001000",
+    }
+
+
+class Scenarios:
+    def __init__(self, accounts: int, cep_keys: int, batch_size: int, seed: int):
+        self.accounts = [
+            {"username": f"bench{index}@example.com", "password": "bench"}
+            for index in range(max(1, accounts))
+        ]
+        self.cep_keys = max(1, cep_keys)
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        # Cada cenário usa uma faixa própria de CPFs para não reaproveitar
+        # simulações em cache de outro cenário.
+        self.offsets = {}
+
+    def _number(self, name: str, index: int) -> int:
+        offset = self.offsets.setdefault(name, (len(self.offsets) + 1) * 10**6)
+        return offset + index
+
+    def _access(self, index: int) -> Dict[str, str]:
+        return self.accounts[index % len(self.accounts)]
+
+    def simulate_fgts(self, index: int) -> Request:
+        contact = make_contact(self._number("simulate_fgts", index))
+        return "POST", f"{API}/simulate_fgts", {
+            "json": {"contact": contact, "bank_access": self._access(index)}
+        }
+
+    def simulate_fgts_batch(self, index: int) -> Request:
+        first = self._number("simulate_fgts_batch", index * self.batch_size)
+        contacts = [make_contact(first + offset) for offset in range(self.batch_size)]
+        return "POST", f"{API}/simulate_fgts/batch", {
+            "json": {"contacts": contacts, "bank_access": self._access(index)}
+        }
+
+    def send_proposal_pix(self, index: int) -> Request:
+        contact = make_contact(self._number("send_proposal_pix", index))
+        pix_resume = {
+            "account_number": "123456",
+            "account_type": "Corrente",
+            "bank_id": "341",
+            "branch_code": "0001",
+            "account_created_at": "2020-01-01",
+        }
+        return "POST", f"{API}/send_proposal_pix", {
+            "json": {"contact": contact, "pix_resume": pix_resume, "bank_access": self._access(index)}
+        }
+
+    def send_proposal_cc(self, index: int) -> Request:
+        contact = make_contact(self._number("send_proposal_cc", index))
+        bank_account_info = {
+            "account_number": "123456",
+            "account_type": "Corrente",
+            "bank_id": "341",
+            "branch_number": "0001",
+        }
+        return "POST", f"{API}/send_proposal_cc", {
+            "json": {
+                "contact": contact,
+                "bank_account_info": bank_account_info,
+                "bank_access": self._access(index),
+            }
+        }
+
+    def get_pix_infos(self, index: int) -> Request:
+        cpf = make_cpf(self._number("get_pix_infos", index))
+        return "POST", f"{API}/get_pix_infos/{cpf}", {"json": {"bank_access": self._access(index)}}
+
+    def get_formalization_url(self, index: int) -> Request:
+        return "POST", f"{API}/get_formalization_url/proposal-{index}", {
+            "json": {"bank_access": self._access(index)}
+        }
+
+    def cep(self, index: int) -> Request:
+        cep = f"{1000000 + self.rng.randrange(self.cep_keys):08d}"
+        return "GET", f"{API}/cep/{cep}", {}
+
+    def banks(self, index: int) -> Request:
+        return "GET", f"{API}/banks", {"headers": {"Accept-Encoding": "gzip"}}
+
+    def banks_search(self, index: int) -> Request:
+        query = self.rng.choice(["itau", "bradesco", "caixa", "001", "nubank", "inter"])
+        return "GET", f"{API}/banks", {"params": {"query": query}}
+
+    def all(self) -> Dict[str, Callable[[int], Request]]:
+        return {
+            "simulate_fgts": self.simulate_fgts,
+            "simulate_fgts_batch": self.simulate_fgts_batch,
+            "send_proposal_pix": self.send_proposal_pix,
+            "send_proposal_cc": self.send_proposal_cc,
+            "get_pix_infos": self.get_pix_infos,
+            "get_formalization_url": self.get_formalization_url,
+            "cep": self.cep,
+            "banks": self.banks,
+            "banks_search": self.banks_search,
+        }
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def max_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # No macOS o valor vem em bytes; no Linux, em KB.
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    fake: FakeUpstream,
+    build: Callable[[int], Request],
+    requests: int,
+    concurrency: int,
+    trace_memory: bool,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for index in counter:
+            method, url, kwargs = build(index)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status = str(response.status_code)
+            except Exception as error:
+                status = type(error).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    fake.reset_counters()
+    if trace_memory:
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    upstream_calls = sum(fake.calls.values())
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "max": round((latencies[-1] if latencies else 0.0) * 1000, 2),
+        },
+        "status_codes": dict(sorted(statuses.items())),
+        "upstream_calls_per_request": round(upstream_calls / requests, 3) if requests else 0.0,
+        "upstream_calls": dict(sorted(fake.calls.items())),
+        "upstream_errors_injected": dict(sorted(fake.errors.items())),
+        "upstream_max_in_flight": fake.max_in_flight,
+        "max_rss_kb": max_rss_kb(),
+    }
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        result["memory_kb"] = {
+            "retained": round((current - memory_before) / 1024, 1),
+            "peak": round((peak - memory_before) / 1024, 1),
+        }
+    return result
+
+
+def install_fake(fake: FakeUpstream):
+    from app.services.http_client import PRATA_HEADERS, http_pool
+
+    # Os clientes compartilhados passam a usar o transporte falso; o restante
+    # do app (pools, retries, circuit breakers, caches) segue o caminho real.
+    http_pool.prata_client = http_pool.build_client(transport=fake, headers=PRATA_HEADERS)
+    http_pool.viacep_client = http_pool.build_client(transport=fake)
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    profile = load_profile(
+        args.profile,
+        latency_scale=args.latency_scale,
+        error_rate=args.error_rate,
+        wait_list_size=args.wait_list_size,
+        pending_rate=args.pending_rate,
+    )
+    fake = FakeUpstream(profile)
+    scenarios = Scenarios(args.accounts, args.cep_keys, args.batch_size, profile.get("seed", 1))
+    available = scenarios.all()
+    selected = args.scenario or list(available)
+    unknown = [name for name in selected if name not in available]
+    if unknown:
+        raise SystemExit(f"Cenários desconhecidos: {', '.join(unknown)}")
+
+    from main import app
+    from app.services.warmup import warmup
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    results = {}
+    install_fake(fake)
+    async with app.router.lifespan_context(app):
+        # Mede a partir do worker pronto, sem as chamadas do aquecimento.
+        if warmup.task is not None:
+            await warmup.task
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", timeout=None
+        ) as client:
+            for name in selected:
+                if args.warmup:
+                    # O aquecimento usa índices depois dos medidos para não
+                    # esquentar o cache com os mesmos CPFs.
+                    build = available[name]
+                    await run_scenario(
+                        client,
+                        fake,
+                        lambda index, build=build: build(args.requests + index),
+                        args.warmup,
+                        args.concurrency,
+                        False,
+                    )
+                results[name] = await run_scenario(
+                    client, fake, available[name], args.requests, args.concurrency, args.trace_memory
+                )
+                print_scenario(name, results[name])
+
+    if args.trace_memory:
+        tracemalloc.stop()
+
+    return {
+        "meta": {
+            "label": args.label,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "accounts": args.accounts,
+            "trace_memory": args.trace_memory,
+        },
+        "profile": profile,
+        "scenarios": results,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        return output.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_scenario(name: str, result: Dict[str, Any]):
+    latency = result["latency_ms"]
+    memory = result.get("memory_kb")
+    memory_text = f" mem_pico={memory['peak']}KB" if memory else ""
+    print(
+        f"{name:<24} {result['throughput_rps']:>9.1f} req/s "
+        f"p50={latency['p50']:.1f}ms p95={latency['p95']:.1f}ms p99={latency['p99']:.1f}ms "
+        f"upstream/req={result['upstream_calls_per_request']} "
+        f"status={result['status_codes']}{memory_text}"
+    )
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    print(f"\nComparação com {baseline['meta'].get('label') or baseline['meta'].get('git_commit')}:")
+    for name, result in current["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        checks = [
+            ("throughput_rps", result["throughput_rps"], previous["throughput_rps"], True),
+            ("p50", result["latency_ms"]["p50"], previous["latency_ms"]["p50"], False),
+            ("p95", result["latency_ms"]["p95"], previous["latency_ms"]["p95"], False),
+            ("p99", result["latency_ms"]["p99"], previous["latency_ms"]["p99"], False),
+            (
+                "upstream/req",
+                result["upstream_calls_per_request"],
+                previous["upstream_calls_per_request"],
+                False,
+            ),
+        ]
+        parts = []
+        for metric, value, before, higher_is_better in checks:
+            if not before:
+                continue
+            change = (value - before) / before
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > threshold else ""
+            if flag:
+                regressions.append(f"{name} {metric}: {before} -> {value}")
+            parts.append(f"{metric} {change:+.1%}{flag}")
+        print(f"  {name:<24} " + "  ".join(parts))
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark da API com bancoprata e ViaCEP simulados localmente"
+    )
+    parser.add_argument("--scenario", action="append", help="Cenário a executar (repetível); padrão: todos")
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requisições simultâneas")
+    parser.add_argument("--warmup", type=int, default=0, help="Requisições de aquecimento por cenário")
+    parser.add_argument("--accounts", type=int, default=3, help="Contas do banco usadas em rodízio")
+    parser.add_argument("--batch-size", type=int, default=20, help="CPFs por requisição de lote")
+    parser.add_argument("--cep-keys", type=int, default=500, help="CEPs distintos sorteados")
+    parser.add_argument("--profile", help="JSON com latências e taxas de erro do upstream")
+    parser.add_argument("--latency-scale", type=float, help="Multiplica todas as latências do upstream")
+    parser.add_argument("--error-rate", type=float, help="Taxa de erro 503 em todos os endpoints")
+    parser.add_argument("--wait-list-size", type=int, help="Itens devolvidos pela fila de saldo")
+    parser.add_argument("--pending-rate", type=float, help="Proporção de CPFs que caem na fila de saldo")
+    parser.add_argument("--trace-memory", action="store_true", help="Mede alocações com tracemalloc (mais lento)")
+    parser.add_argument("--label", help="Nome da execução; padrão: commit atual")
+    parser.add_argument("--output", help="Arquivo de resultado; padrão: benchmarks/results/<label>.json")
+    parser.add_argument("--no-save", action="store_true", help="Não grava o resultado")
+    parser.add_argument("--compare", help="Resultado anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Piora relativa considerada regressão")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Sai com código 1 se houver regressão")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    args.label = args.label or git_commit() or time.strftime("%Y%m%d-%H%M%S")
+    result = asyncio.run(run_benchmark(args))
+
+    if not args.no_save:
+        output = args.output or os.path.join(RESULTS_DIR, f"{args.label}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2, ensure_ascii=False)
+        print(f"\nResultado gravado em {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(result, baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            print("\nRegressões:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,49 @@
-
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from app.routers.prata_api_router import router as prata_router
+from app.services.http_client import http_pool
+from app.services.proxy_pool import proxy_pool
+from app.services.wait_list_poller import wait_list_pollers
+from app.services.formalization_poller import formalization_pollers
+from app.services.job_manager import job_manager
+from app.services.proposal_journal import proposal_journal
+from app.services.shared_cache import shared_cache_store
+from app.services.metrics import MetricsMiddleware, METRICS_CONTENT_TYPE, render_metrics
+from app.utils.logger import RequestIdMiddleware, setup_logging, shutdown_logging
+from app.utils.json_codec import FastJSONResponse
+from app.services.warmup import warmup
 from fastapi.middleware.cors import CORSMiddleware
 
+
+setup_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await proposal_journal.purge()
+    await http_pool.start(prata=not proxy_pool.enabled)
+    await proxy_pool.start()
+    await job_manager.start()
+    await warmup.start()
+    yield
+    await warmup.close()
+    await job_manager.close()
+    await wait_list_pollers.close()
+    await formalization_pollers.close()
+    await proxy_pool.close()
+    await http_pool.close()
+    await proposal_journal.close()
+    if shared_cache_store.enabled:
+        await shared_cache_store.close()
+    shutdown_logging()
+
+
 app = FastAPI(
     title="FGTS API",
     description="API para consulta de saldo FGTS e status",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 app.add_middleware(
@@ -17,8 +54,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
 app.include_router(prata_router, prefix="/api/v1")
 
 @app.get("/")
 def read_root():
-    return {"message": "rodando!"}
\ No newline at end of file
+    return {"message": "rodando!"}
+
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    return FastJSONResponse(warmup.snapshot(), status_code=200 if warmup.ready else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # No event loop: o coletor lê estado (filas, breakers, pools) que só o
+    # loop altera.
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,103 @@
+import pytest
+from app.services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    is_circuit_open,
+)
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.setenv("CIRCUIT_TEST_MIN_CALLS", "4")
+    monkeypatch.setenv("CIRCUIT_TEST_WINDOW", "4")
+    monkeypatch.setenv("CIRCUIT_TEST_FAILURE_RATE", "0.5")
+    monkeypatch.setenv("CIRCUIT_TEST_OPEN_SECONDS", "30")
+    monkeypatch.setenv("CIRCUIT_TEST_SLOW_CALL_SECONDS", "2")
+    monkeypatch.setenv("CIRCUIT_TEST_HALF_OPEN_CALLS", "1")
+    return CircuitBreaker("test")
+
+
+def open_breaker(breaker):
+    for failed in (True, True, False, False):
+        breaker.acquire()
+        breaker.record(failed, 0.1)
+    assert breaker.state == OPEN
+
+
+def expire(breaker):
+    breaker.opened_at -= breaker.open_seconds
+
+
+def test_stays_closed_until_min_calls(breaker):
+    for _ in range(3):
+        breaker.acquire()
+        breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+
+def test_opens_at_failure_rate_and_rejects(breaker):
+    open_breaker(breaker)
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.acquire()
+    assert 0 < error.value.retry_after <= 30
+    assert breaker.rejected == 1
+    assert is_circuit_open(RuntimeError("outro erro")) is False
+    try:
+        try:
+            breaker.acquire()
+        except CircuitOpenError:
+            raise RuntimeError("wrapped")
+    except RuntimeError as wrapped:
+        assert is_circuit_open(wrapped)
+
+
+def test_slow_calls_count_as_failures(breaker):
+    for _ in range(4):
+        breaker.acquire()
+        breaker.record(False, 5.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_allows_limited_probes_then_closes(breaker):
+    open_breaker(breaker)
+    expire(breaker)
+    breaker.acquire()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.record(False, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["calls_in_window"] == 0
+    breaker.acquire()
+
+
+def test_failed_probe_reopens(breaker):
+    open_breaker(breaker)
+    expire(breaker)
+    breaker.acquire()
+    breaker.record(True, 0.1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+
+def test_ignored_outcome_releases_probe(breaker):
+    # record(None, ...) é a chamada sem resultado (ex.: cancelada no meio).
+    open_breaker(breaker)
+    expire(breaker)
+    breaker.acquire()
+    breaker.record(None, 0.1)
+    assert breaker.state == HALF_OPEN
+    breaker.acquire()
+    breaker.record(False, 0.1)
+    assert breaker.state == CLOSED
+
+
+def test_ignored_outcome_does_not_enter_window(breaker):
+    for _ in range(10):
+        breaker.acquire()
+        breaker.record(None, 0.1)
+    assert breaker.snapshot()["calls_in_window"] == 0
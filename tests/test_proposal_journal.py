@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+from app.exceptions import APIException
+from app.services.proposal_journal import ProposalJournal, request_fingerprint
+from app.services.retry_policy import deadline_scope
+
+FINGERPRINT = request_fingerprint({"contact": {"cpf": "52998224725"}, "bank_access": {"username": "u"}})
+
+
+def make_journal(path, lease_ttl: float = 60) -> ProposalJournal:
+    return ProposalJournal(str(path), ttl=3600, lease_ttl=lease_ttl, poll_interval=0.02)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_fingerprint_ignores_bank_access():
+    data = {"contact": {"cpf": "52998224725"}}
+    assert request_fingerprint({**data, "bank_access": {"password": "a"}}) == request_fingerprint(
+        {**data, "bank_access": {"password": "b"}}
+    )
+    assert request_fingerprint(data) != request_fingerprint({"contact": {"cpf": "11144477735"}})
+
+
+def test_finished_proposal_returns_stored_result(tmp_path):
+    async def scenario():
+        journal = make_journal(tmp_path / "journal.sqlite")
+        async with journal.claim("key", FINGERPRINT) as (stored, completed):
+            assert (stored, completed) == (None, {})
+            await journal.record_stage("key", "account", {"id": 1})
+            await journal.finish("key", {"proposal": 10})
+        async with journal.claim("key", FINGERPRINT) as (stored, completed):
+            assert stored == {"proposal": 10}
+            assert completed == {}
+        await journal.close()
+
+    run(scenario())
+
+
+def test_failed_attempt_resumes_from_recorded_stages(tmp_path):
+    async def scenario():
+        journal = make_journal(tmp_path / "journal.sqlite")
+        with pytest.raises(RuntimeError):
+            async with journal.claim("key", FINGERPRINT):
+                await journal.record_stage("key", "account", {"id": 1})
+                await journal.record_stage("key", "qualification", ["ok"])
+                raise RuntimeError("falha no endereço")
+        async with journal.claim("key", FINGERPRINT) as (stored, completed):
+            assert stored is None
+            assert completed == {"account": {"id": 1}, "qualification": ["ok"]}
+        await journal.close()
+
+    run(scenario())
+
+
+def test_reused_key_with_other_content_is_rejected(tmp_path):
+    async def scenario():
+        journal = make_journal(tmp_path / "journal.sqlite")
+        async with journal.claim("key", FINGERPRINT):
+            pass
+        other = request_fingerprint({"contact": {"cpf": "11144477735"}})
+        with pytest.raises(APIException) as error:
+            async with journal.claim("key", other):
+                pass
+        assert error.value.status_code == 422
+        await journal.close()
+
+    run(scenario())
+
+
+def test_key_held_by_another_worker_answers_409_when_deadline_is_short(tmp_path):
+    async def scenario():
+        path = tmp_path / "journal.sqlite"
+        first, second = make_journal(path), make_journal(path)
+        async with first.claim("key", FINGERPRINT):
+            with deadline_scope(0.2):
+                with pytest.raises(APIException) as error:
+                    async with second.claim("key", FINGERPRINT):
+                        pass
+        assert error.value.status_code == 409
+        await first.close()
+        await second.close()
+
+    run(scenario())
+
+
+def test_waiting_worker_receives_result_of_the_first(tmp_path):
+    async def scenario():
+        path = tmp_path / "journal.sqlite"
+        first, second = make_journal(path), make_journal(path)
+
+        async def wait_second():
+            async with second.claim("key", FINGERPRINT) as (stored, _):
+                return stored
+
+        async with first.claim("key", FINGERPRINT):
+            waiting = asyncio.ensure_future(wait_second())
+            await asyncio.sleep(0.1)
+            assert not waiting.done()
+            await first.finish("key", {"proposal": 10})
+        assert await asyncio.wait_for(waiting, 2) == {"proposal": 10}
+        await first.close()
+        await second.close()
+
+    run(scenario())
+
+
+def test_expired_lease_is_taken_over_with_completed_stages(tmp_path):
+    async def scenario():
+        path = tmp_path / "journal.sqlite"
+        crashed, second = make_journal(path, lease_ttl=0.1), make_journal(path)
+        # Worker que caiu: assumiu a chave, gravou uma etapa e nunca liberou.
+        await crashed._run(crashed._try_claim, "key", FINGERPRINT)
+        await crashed.record_stage("key", "account", {"id": 1})
+        async with second.claim("key", FINGERPRINT) as (stored, completed):
+            assert stored is None
+            assert completed == {"account": {"id": 1}}
+        await crashed.close()
+        await second.close()
+
+    run(scenario())
+
+
+def test_purge_removes_old_entries(tmp_path):
+    async def scenario():
+        journal = make_journal(tmp_path / "journal.sqlite")
+        async with journal.claim("key", FINGERPRINT):
+            await journal.record_stage("key", "account", {"id": 1})
+            await journal.finish("key", {"proposal": 10})
+        journal.ttl = -1
+        await journal.purge()
+        async with journal.claim("key", FINGERPRINT) as (stored, completed):
+            assert (stored, completed) == (None, {})
+        await journal.close()
+
+    run(scenario())
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from app.services.rate_limiter import FairQueue, RateLimiter, RateLimitError, TokenBucket
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    for name in ("RATE_LIMIT_RPS", "RATE_LIMIT_TENANT_RPS"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("RATE_LIMIT_MAX_WAIT", "0.2")
+    monkeypatch.setenv("RATE_LIMIT_TENANT_CACHE_SIZE", "3")
+    return RateLimiter()
+
+
+def test_token_bucket_reserve_and_refund():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    bucket.refund()
+    assert bucket.time_until_available() == pytest.approx(0.1, abs=0.01)
+
+
+def test_fair_queue_serves_tenants_in_turn():
+    async def scenario():
+        queue = FairQueue(TokenBucket(rate=200, burst=1))
+        assert queue.try_acquire()
+        order = []
+
+        async def wait(tenant):
+            await queue.enqueue(tenant)
+            order.append(tenant)
+
+        # "big" enfileira tudo antes; "small" ainda é atendida na sua vez.
+        await asyncio.gather(*(wait("big") for _ in range(4)), *(wait("small") for _ in range(2)))
+        return order
+
+    assert run(scenario()) == ["big", "small", "big", "small", "big", "big"]
+
+
+def test_disabled_limits_keep_no_state(limiter):
+    async def scenario():
+        for index in range(50):
+            await limiter.acquire(f"tenant{index}", "balance")
+
+    run(scenario())
+    assert not limiter.account_buckets
+    assert not limiter.tenants
+
+
+def test_endpoint_override_does_not_enable_tenant_limit(limiter, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_ACCOUNT_RPS", "5")
+    assert limiter._account_bucket("tenant", "account") is None
+    assert limiter._endpoint_queue("account").bucket.rate == 5
+
+
+def test_tenant_state_is_bounded(limiter, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_TENANT_RPS", "100")
+
+    async def scenario():
+        for index in range(10):
+            await limiter.acquire(f"tenant{index}", "balance")
+
+    run(scenario())
+    assert list(limiter.tenants) == ["tenant7", "tenant8", "tenant9"]
+    assert len(limiter.account_buckets) == 3
+
+
+def test_tenant_over_its_limit_is_rejected(limiter, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_TENANT_RPS", "1")
+
+    async def scenario():
+        await limiter.acquire("tenant", "pix")
+        with pytest.raises(RateLimitError):
+            await limiter.acquire("tenant", "pix")
+
+    run(scenario())
+    assert limiter.tenants["tenant"].rejected == 1
+
+
+def test_queue_timeout_refunds_the_tenant_token(limiter, monkeypatch):
+    # Bucket da conta quase sem reposição: só a devolução explica o saldo.
+    monkeypatch.setenv("RATE_LIMIT_TENANT_RPS", "0.01")
+    monkeypatch.setenv("RATE_LIMIT_TENANT_BURST", "5")
+    monkeypatch.setenv("RATE_LIMIT_RPS", "1")
+
+    async def scenario():
+        await limiter.acquire("tenant", "balance")
+        bucket = limiter._account_bucket("tenant", "balance")
+        before = bucket.tokens
+        with pytest.raises(RateLimitError):
+            await limiter.acquire("tenant", "balance")
+        return before, bucket.tokens
+
+    before, after = run(scenario())
+    assert after >= before
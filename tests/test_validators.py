@@ -0,0 +1,88 @@
+from datetime import date
+import pytest
+from app.utils.validators import (
+    ContactValidationError,
+    normalize_contact,
+    validate_cep,
+    validate_contacts,
+    validate_cpf,
+    validate_date,
+    validate_phone,
+)
+
+
+def test_validate_cpf_normalizes_formatted_input():
+    assert validate_cpf("529.982.247-25") == "52998224725"
+    assert validate_cpf(" 111.444.777-35 ") == "11144477735"
+
+
+@pytest.mark.parametrize("cpf", ["52998224724", "52998224735", "11111111111", "123", ""])
+def test_validate_cpf_rejects_bad_check_digits_and_sizes(cpf):
+    with pytest.raises(ValueError):
+        validate_cpf(cpf)
+
+
+def test_validate_phone_accepts_mobile_with_country_code():
+    assert validate_phone("+55 (11) 98765-4321") == "11987654321"
+
+
+@pytest.mark.parametrize("phone", ["1133334444", "11887654321", "20987654321", "987654321"])
+def test_validate_phone_rejects_landlines_and_unknown_ddd(phone):
+    with pytest.raises(ValueError):
+        validate_phone(phone)
+
+
+def test_validate_date_accepts_both_formats_and_rejects_future():
+    assert validate_date("31/12/1990") == "1990-12-31"
+    assert validate_date("1990-12-31") == "1990-12-31"
+    with pytest.raises(ValueError):
+        validate_date(date(date.today().year + 1, 1, 1).isoformat())
+    with pytest.raises(ValueError):
+        validate_date("30/02/1990")
+
+
+def test_validate_cep():
+    assert validate_cep("01001-000") == "01001000"
+    for cep in ("abc", "00000000", "1234"):
+        with pytest.raises(ValueError):
+            validate_cep(cep)
+
+
+def test_normalize_contact_collects_every_field_error():
+    with pytest.raises(ContactValidationError) as error:
+        normalize_contact({"cpf": "52998224724", "phone": "1133334444", "state": "XX"})
+    assert set(error.value.errors) == {"cpf", "phone", "state"}
+
+
+def test_normalize_contact_rejects_issue_date_before_birthdate():
+    with pytest.raises(ContactValidationError) as error:
+        normalize_contact(
+            {"cpf": "52998224725", "birthdate": "2000-01-01", "document_issue_date": "1999-01-01"}
+        )
+    assert "document_issue_date" in error.value.errors
+
+
+def test_validate_contacts_splits_valid_invalid_and_repeated():
+    result = validate_contacts(
+        [
+            {"cpf": "529.982.247-25", "zip_code": "01001-000"},
+            {"cpf": "52998224724"},
+            "não é um contato",
+            {"cpf": "52998224725"},
+            {},
+        ]
+    )
+    assert result["valid"] == [
+        {"index": 0, "contact": {"cpf": "52998224725", "zip_code": "01001000"}}
+    ]
+    invalid = {item["index"]: item["errors"] for item in result["invalid"]}
+    assert set(invalid) == {1, 2, 3, 4}
+    assert "cpf" in invalid[1]
+    assert invalid[2] == {"contact": "Contato inválido"}
+    assert invalid[3]["cpf"] == "CPF repetido (índice 0)"
+    assert invalid[4] == {"cpf": "Campo obrigatório"}
+
+
+def test_validate_contacts_with_no_required_fields():
+    result = validate_contacts([{"phone": "11987654321"}], required=())
+    assert result["valid"][0]["contact"] == {"phone": "11987654321"}